@@ -0,0 +1,272 @@
+# async_crud.py – asyncio counterpart of AnimalShelter
+import asyncio
+import inspect
+import time
+from itertools import islice
+
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from CRUD_Python_Module.crud import (
+    AnimalShelter,
+    add_bulk_error,
+    add_bulk_result,
+    connection_settings,
+    new_write_stats,
+    pool_options_from_env,
+)
+
+try:
+    # PyMongo's native asyncio client (4.9+), the successor of Motor
+    from pymongo import AsyncMongoClient
+except ImportError:
+    try:
+        from motor.motor_asyncio import AsyncIOMotorClient as AsyncMongoClient
+    except ImportError:
+        AsyncMongoClient = None
+
+
+class AsyncAnimalShelter:
+    """
+    asyncio version of AnimalShelter for callers that should not block on MongoDB.
+
+    Same credentials (.env), pool settings and return conventions as AnimalShelter
+    (errors are printed and an empty result is returned). Every method is a
+    coroutine, so independent queries can run concurrently with asyncio.gather().
+
+    Uses PyMongo's AsyncMongoClient, or Motor on older PyMongo versions. An async
+    database object can also be passed in (e.g. a mongomock-motor database in tests).
+    Async clients belong to the event loop that first uses them: create one
+    shelter per loop and close() it when the loop is done.
+    """
+
+    def __init__(self, pool_options: dict = None, database=None):
+        if database is not None:
+            self.client = None
+            self.database = database
+            return
+
+        if AsyncMongoClient is None:
+            raise ImportError("AsyncAnimalShelter needs PyMongo 4.9+ (AsyncMongoClient) or Motor installed.")
+
+        uri, db_name, _ = connection_settings()
+        self.pool_options = {**pool_options_from_env(), **(pool_options or {})}
+        self.client = AsyncMongoClient(uri, connect=False, **self.pool_options)
+        self.database = self.client[db_name]
+
+    async def close(self):
+        if self.client is not None:
+            result = self.client.close()
+            if inspect.isawaitable(result):
+                await result
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # -------------------------------
+    # CREATE
+    # -------------------------------
+    async def create(self, data: dict, collection: str):
+        """Insert a new document into the MongoDB collection."""
+        if not collection:
+            raise Exception("Collection name required.")
+        if not data:
+            return False
+
+        try:
+            result = await self.database[collection].insert_one(data)
+            return result.acknowledged
+        except OperationFailure as e:
+            print(f"Create failed: {e}")
+            return False
+
+    # -------------------------------
+    # BULK WRITE (BATCHED, CONCURRENT)
+    # -------------------------------
+    async def bulk_write(self, operations, collection: str, batch_size: int = 1000,
+                         ordered: bool = False, concurrency: int = 4):
+        """
+        Write documents and/or write operations in batches, like AnimalShelter.bulk_write.
+
+        Unordered loads keep up to `concurrency` batches in flight at once and read the
+        next batch from operations only when one finishes, so no more than that many
+        batches are in memory; ordered loads send one batch at a time. Returns the same
+        stats dict.
+        """
+        if not collection:
+            raise Exception("Collection name required.")
+        if batch_size <= 0:
+            raise Exception("batch_size must be positive.")
+
+        stats = new_write_stats()
+        started = time.perf_counter()
+        limit = 1 if ordered else max(1, concurrency)
+
+        pending = set()
+        iterator = iter(operations)
+        while True:
+            if len(pending) >= limit:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()
+
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+
+            batch_no = stats["batches"]
+            stats["batches"] += 1
+            stats["operations"] += len(batch)
+            pending.add(asyncio.ensure_future(self._write_batch(batch, collection, ordered, batch_no, stats)))
+        if pending:
+            await asyncio.gather(*pending)
+
+        stats["seconds"] = time.perf_counter() - started
+        stats["ops_per_sec"] = stats["operations"] / stats["seconds"] if stats["seconds"] else 0.0
+        return stats
+
+    async def _write_batch(self, batch, collection, ordered, batch_no, stats):
+        """Send one batch and fold its result (or error details) into stats."""
+        try:
+            if all(isinstance(op, dict) for op in batch):
+                result = await self.database[collection].insert_many(batch, ordered=ordered)
+                stats["inserted"] += len(result.inserted_ids)
+                return
+
+            requests = [InsertOne(op) if isinstance(op, dict) else op for op in batch]
+            result = await self.database[collection].bulk_write(requests, ordered=ordered)
+            add_bulk_result(stats, result)
+
+        except BulkWriteError as e:
+            add_bulk_error(stats, e.details or {}, batch_no)
+
+        except OperationFailure as e:
+            stats["errors"].append({"batch": batch_no, "index": None, "code": e.code, "message": str(e)})
+
+    # -------------------------------
+    # READ
+    # -------------------------------
+    async def read(self, query: dict, collection: str, projection: dict = None):
+        """Read ALL documents that match the query."""
+        if not collection:
+            raise Exception("Collection name required.")
+
+        try:
+            return await self.database[collection].find(query or {}, projection).to_list(None)
+        except OperationFailure as e:
+            print(f"Read failed: {e}")
+            return []
+
+    async def stream(self, query: dict, collection: str, projection: dict = None,
+                     batch_size: int = 1000, chunk_size: int = None, after_id=None, before_id=None):
+        """
+        Async generator over matching documents (or lists of up to chunk_size documents).
+
+        The cursor fetches batch_size documents per round trip; while the caller
+        processes one chunk other coroutines keep running.
+        """
+        if not collection:
+            raise Exception("Collection name required.")
+        if batch_size <= 0:
+            raise Exception("batch_size must be positive.")
+
+        try:
+            cursor = self.database[collection].find(
+                AnimalShelter._id_range_query(query or {}, after_id, before_id),
+                projection,
+                batch_size=batch_size,
+            )
+            chunk = []
+            async for document in cursor:
+                if not chunk_size:
+                    yield document
+                    continue
+                chunk.append(document)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+        except OperationFailure as e:
+            print(f"Stream failed: {e}")
+            return
+
+    # -------------------------------
+    # COUNT / MAX VALUE
+    # -------------------------------
+    async def count(self, collection: str, query: dict = None):
+        """Count documents; uses the fast collection metadata count when no query is given."""
+        if not collection:
+            raise Exception("Collection name required.")
+        try:
+            if not query:
+                return await self.database[collection].estimated_document_count()
+            return await self.database[collection].count_documents(query)
+        except OperationFailure as e:
+            print(f"Count failed: {e}")
+            return 0
+
+    async def max_value(self, collection: str, field: str = "_id"):
+        """Return the largest value of a field in the collection, or None if it is empty."""
+        if not collection:
+            raise Exception("Collection name required.")
+        try:
+            cursor = (
+                self.database[collection]
+                .find({field: {"$exists": True}}, {field: 1})
+                .sort(field, -1)
+                .limit(1)
+            )
+            latest = await cursor.to_list(1)
+            return latest[0].get(field) if latest else None
+        except OperationFailure as e:
+            print(f"Max value lookup failed: {e}")
+            return None
+
+    # -------------------------------
+    # UPDATE / DELETE
+    # -------------------------------
+    async def update(self, query: dict, new_data: dict, collection: str):
+        """Update documents that match query."""
+        if not collection:
+            raise Exception("Collection name required.")
+        try:
+            result = await self.database[collection].update_many(query, {"$set": new_data})
+            return result.modified_count
+        except OperationFailure as e:
+            print(f"Update failed: {e}")
+            return 0
+
+    async def delete(self, query: dict, collection: str):
+        """Delete documents that match query."""
+        if not collection:
+            raise Exception("Collection name required.")
+        try:
+            result = await self.database[collection].delete_many(query)
+            return result.deleted_count
+        except OperationFailure as e:
+            print(f"Delete failed: {e}")
+            return 0
+
+    # -------------------------------
+    # AGGREGATE
+    # -------------------------------
+    async def aggregate(self, pipeline, collection: str):
+        """Run an aggregation pipeline (stage list or AggregationBuilder) and return the documents."""
+        if not collection:
+            raise Exception("Collection name required.")
+        if hasattr(pipeline, "build"):
+            pipeline = pipeline.build()
+        try:
+            cursor = self.database[collection].aggregate(pipeline, allowDiskUse=True)
+            # AsyncMongoClient returns the cursor from a coroutine, Motor returns it directly
+            if inspect.isawaitable(cursor):
+                cursor = await cursor
+            return await cursor.to_list(None)
+        except OperationFailure as e:
+            print(f"Aggregation failed: {e}")
+            return []
@@ -1,59 +1,283 @@
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, OperationFailure
+from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, MongoClient, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+from pymongo.monitoring import ConnectionPoolListener
 from dotenv import load_dotenv
+from itertools import islice
 import os
+import re
+import threading
+import time
 
 
 # Load environment variables from .env
 load_dotenv()
 
+# Materialized rollup collections maintained by the ETL (see etl/rollups.py)
+ROLLUP_COLLECTIONS = {
+    "breed_outcome_year": "rollup_breed_outcome_year",
+    "age_group": "rollup_age_group",
+    "days_in_shelter": "rollup_days_in_shelter",
+    "rescue_breed": "rollup_rescue_breed",
+}
 
-class AnimalShelter:
-    """Enhanced CRUD class for MongoDB Atlas with environment-based credentials and improved structure."""
+# Scratch collection used to feed batches into $merge / $out
+STAGING_COLLECTION = "rollup_staging"
+
+
+# Connection pool settings read from .env (unset = driver default)
+POOL_OPTIONS_ENV = {
+    "maxPoolSize": ("MONGO_MAX_POOL_SIZE", int),
+    "minPoolSize": ("MONGO_MIN_POOL_SIZE", int),
+    "maxIdleTimeMS": ("MONGO_MAX_IDLE_MS", int),
+    "waitQueueTimeoutMS": ("MONGO_WAIT_QUEUE_TIMEOUT_MS", int),
+    "maxConnecting": ("MONGO_MAX_CONNECTING", int),
+}
+
+# pymongo's default maxPoolSize (used for utilization when none is configured)
+DEFAULT_MAX_POOL_SIZE = 100
+
+
+def pool_options_from_env():
+    """Pool keyword arguments for MongoClient taken from the environment."""
+    options = {}
+    for option, (env_name, cast) in POOL_OPTIONS_ENV.items():
+        value = os.getenv(env_name)
+        if value not in (None, ""):
+            options[option] = cast(value)
+    return options
+
+
+def connection_settings():
+    """Return (Atlas URI, database name, log label) built from the .env credentials."""
+    # Load credentials from .env
+    username = os.getenv("MONGO_USER")
+    password = os.getenv("MONGO_PASS")
+    cluster = os.getenv("MONGO_CLUSTER")
+    db_name = os.getenv("MONGO_DB", "aac")
+
+    # Validate required values
+    if not all([username, password, cluster]):
+        raise Exception("Missing required MongoDB credentials in .env file.")
+
+    # Build the secure connection string
+    mongo_uri = (
+        f"mongodb+srv://{username}:{password}@{cluster}.mongodb.net/"
+        f"{db_name}?retryWrites=true&w=majority"
+    )
+    return mongo_uri, db_name, f"{cluster}/{db_name}"
+
+
+class PoolMetrics(ConnectionPoolListener):
+    """Connection pool counters for one client, fed by pymongo's pool events."""
+
+    def __init__(self, max_pool_size=DEFAULT_MAX_POOL_SIZE):
+        self.max_pool_size = max_pool_size
+        self._lock = threading.Lock()
+        self._counts = {
+            "open": 0, "in_use": 0, "waiting": 0,
+            "peak_in_use": 0, "peak_waiting": 0,
+            "created": 0, "closed": 0, "checkouts": 0, "checkout_failures": 0,
+            "pool_clears": 0, "checkout_wait_seconds": 0.0,
+        }
+
+    def _add(self, **deltas):
+        with self._lock:
+            counts = self._counts
+            for name, delta in deltas.items():
+                counts[name] += delta
+            counts["peak_in_use"] = max(counts["peak_in_use"], counts["in_use"])
+            counts["peak_waiting"] = max(counts["peak_waiting"], counts["waiting"])
+
+    def stats(self):
+        """Snapshot of the counters plus utilization (connections in use / maxPoolSize)."""
+        with self._lock:
+            stats = dict(self._counts)
+        stats["max_pool_size"] = self.max_pool_size
+        stats["utilization"] = stats["in_use"] / self.max_pool_size if self.max_pool_size else 0.0
+        stats["avg_checkout_wait_ms"] = (
+            1000 * stats["checkout_wait_seconds"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        )
+        return stats
+
+    # pymongo event callbacks
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add(pool_clears=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(open=1, created=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(open=-1, closed=1)
+
+    def connection_check_out_started(self, event):
+        self._add(waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._add(waiting=-1, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._add(waiting=-1, in_use=1, checkouts=1, checkout_wait_seconds=getattr(event, "duration", 0.0) or 0.0)
+
+    def connection_checked_in(self, event):
+        self._add(in_use=-1)
+
+
+class ClientRegistry:
+    """
+    One MongoClient (and so one connection pool) per URI + pool options, per process.
+
+    - every AnimalShelter with the same settings shares the client: threads and
+      callbacks reuse pooled connections instead of each paying the TLS/auth handshake
+    - clients are created on first use with connect=False, so nothing is dialled
+      until the first operation
+    - a forked child (gunicorn workers, ProcessPoolExecutor) never reuses the
+      parent's sockets: the registry notices the new pid and builds fresh clients
+    """
 
     def __init__(self):
-        """Initialize secure MongoDB connection using environment-based credentials."""
-        try:
-            # Load credentials from .env
-            username = os.getenv("MONGO_USER")
-            password = os.getenv("MONGO_PASS")
-            cluster = os.getenv("MONGO_CLUSTER")
-            db_name = os.getenv("MONGO_DB", "aac")
-
-            # Validate required values
-            if not all([username, password, cluster]):
-                raise Exception("Missing required MongoDB credentials in .env file.")
-
-            # Build the secure connection string
-            mongo_uri = (
-                f"mongodb+srv://{username}:{password}@{cluster}.mongodb.net/"
-                f"{db_name}?retryWrites=true&w=majority"
-            )
+        self._lock = threading.Lock()
+        self._clients = {}   # key -> (client, metrics, label)
+        self._pid = os.getpid()
 
-            # Create the client and select database
-            self.client = MongoClient(mongo_uri)
-            self.database = self.client[db_name]
+    def get(self, uri, label="default", **pool_options):
+        """Return the shared client for uri + pool options, creating it if needed."""
+        key = (uri, tuple(sorted(pool_options.items())))
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked: the inherited clients belong to the parent process
+                self._clients = {}
+                self._pid = os.getpid()
 
-            print("Connected to MongoDB Atlas successfully using secure .env variables.")
+            entry = self._clients.get(key)
+            if entry is None:
+                label = f"{label} {pool_options}" if pool_options else label
+                metrics = PoolMetrics(pool_options.get("maxPoolSize", DEFAULT_MAX_POOL_SIZE))
+                client = MongoClient(uri, connect=False, event_listeners=[metrics], **pool_options)
+                entry = self._clients[key] = (client, metrics, label)
+                print(f"MongoDB client for {label} ready; connects on first use.")
+            return entry[0]
 
-        except ConnectionFailure as e:
-            print(f"Could not connect to MongoDB Atlas: {e}")
-            raise
+    def _entries(self):
+        """Snapshot of the registered (client, metrics, label) entries."""
+        with self._lock:
+            return list(self._clients.values())
 
-        # ---------------------------------------
-        # INDEXES FOR PERFORMANCE (Enhancement #2)
-        # ---------------------------------------
+    def metrics(self, client):
+        """PoolMetrics of a registered client, or None."""
+        for registered, metrics, _ in self._entries():
+            if registered is client:
+                return metrics
+        return None
 
-        try:
-            # Create indexes on fields frequently used in queries/filters
-            self.database["animals"].create_index("animal_type")
-            self.database["animals"].create_index("breed")
-            self.database["animals"].create_index("outcome_type")
+    def stats(self):
+        """Pool statistics of every client in this process, by label."""
+        return {label: metrics.stats() for _, metrics, label in self._entries()}
 
-            print("Indexes created successfully for performance optimization.")
+    def reset(self, close=False):
+        """Forget every client (closing them first when close=True)."""
+        with self._lock:
+            clients, self._clients = self._clients, {}
+            self._pid = os.getpid()
+        if close:
+            for client, _, _ in clients.values():
+                client.close()
 
-        except Exception as e:
-            print(f"Index creation failed: {e}")
+    def _after_fork(self):
+        """
+        Forked child: drop the parent's clients without closing them.
+
+        Only the forking thread survives in the child, so a lock held by any other
+        parent thread would never be released; replace it instead of acquiring it.
+        """
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._pid = os.getpid()
+
+
+# Process-wide registry used by AnimalShelter
+clients = ClientRegistry()
+
+if hasattr(os, "register_at_fork"):
+    # Drop (without closing) the parent's clients in a forked child
+    os.register_at_fork(after_in_child=lambda: clients._after_fork())
+
+
+def new_write_stats():
+    """Empty stats dict returned by bulk_write()."""
+    return {
+        "batches": 0, "operations": 0, "inserted": 0, "upserted": 0,
+        "matched": 0, "modified": 0, "deleted": 0, "errors": [],
+    }
+
+
+def add_bulk_result(stats, result):
+    """Fold a BulkWriteResult into bulk_write() stats."""
+    stats["inserted"] += result.inserted_count
+    stats["upserted"] += result.upserted_count
+    stats["matched"] += result.matched_count
+    stats["modified"] += result.modified_count
+    stats["deleted"] += result.deleted_count
+
+
+def add_bulk_error(stats, details, batch_no):
+    """Fold a BulkWriteError's details (what was applied + each failed op) into stats."""
+    stats["inserted"] += details.get("nInserted", 0)
+    stats["upserted"] += details.get("nUpserted", 0)
+    stats["matched"] += details.get("nMatched", 0)
+    stats["modified"] += details.get("nModified", 0)
+    stats["deleted"] += details.get("nRemoved", 0)
+    for err in details.get("writeErrors", []):
+        stats["errors"].append({
+            "batch": batch_no,
+            "index": err.get("index"),
+            "code": err.get("code"),
+            "message": err.get("errmsg"),
+        })
+
+
+class AnimalShelter:
+    """Enhanced CRUD class for MongoDB Atlas with environment-based credentials and improved structure."""
+
+    def __init__(self, pool_options: dict = None):
+        """
+        Prepare a MongoDB connection using environment-based credentials.
+
+        The client comes from the process-wide registry (shared by every
+        AnimalShelter with the same settings) and connects on first use.
+        pool_options override the MONGO_*_POOL_* settings from .env.
+        """
+        self._uri, self.db_name, self._label = connection_settings()
+        self.pool_options = {**pool_options_from_env(), **(pool_options or {})}
+
+        # Indexes are declared in indexes.py and reconciled once per deploy
+        # (python CRUD_Python_Module/indexes.py), not on every connection
+
+    @property
+    def client(self):
+        """Shared MongoClient for this process (re-created after a fork)."""
+        return clients.get(self._uri, self._label, **self.pool_options)
+
+    @property
+    def database(self):
+        return self.client[self.db_name]
+
+    def pool_stats(self):
+        """Connection pool statistics of this shelter's client (in use, waiting, utilization, ...)."""
+        metrics = clients.metrics(self.client)
+        return metrics.stats() if metrics is not None else {}
 
     # -------------------------------
     # CREATE
@@ -72,6 +296,77 @@ class AnimalShelter:
             print(f"Create failed: {e}")
             return False
 
+    # -------------------------------
+    # BULK WRITE (BATCHED, UNORDERED)
+    # -------------------------------
+    def bulk_write(self, operations, collection: str, batch_size: int = 1000, ordered: bool = False):
+        """
+        Write an iterable of documents and/or write operations in batches.
+
+        - plain dicts are inserted; pymongo operations (InsertOne, UpdateOne,
+          ReplaceOne, DeleteOne, ...) are passed through
+        - each batch is one insert_many/bulk_write round trip, unordered by default
+          so the server can apply it in parallel and one bad document does not stop the rest
+        - a failing batch is recorded in "errors" and the load carries on
+
+        Returns a stats dict with per-operation counts, errors and throughput.
+        """
+        if not collection:
+            raise Exception("Collection name required.")
+        if batch_size <= 0:
+            raise Exception("batch_size must be positive.")
+
+        stats = new_write_stats()
+        started = time.perf_counter()
+
+        iterator = iter(operations)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+
+            batch_no = stats["batches"]
+            stats["batches"] += 1
+            stats["operations"] += len(batch)
+            self._write_batch(batch, collection, ordered, batch_no, stats)
+
+        stats["seconds"] = time.perf_counter() - started
+        stats["ops_per_sec"] = stats["operations"] / stats["seconds"] if stats["seconds"] else 0.0
+        return stats
+
+    def _write_batch(self, batch, collection, ordered, batch_no, stats):
+        """Send one batch and fold its result (or error details) into stats."""
+        try:
+            if all(isinstance(op, dict) for op in batch):
+                result = self.database[collection].insert_many(batch, ordered=ordered)
+                stats["inserted"] += len(result.inserted_ids)
+                return
+
+            requests = [InsertOne(op) if isinstance(op, dict) else op for op in batch]
+            result = self.database[collection].bulk_write(requests, ordered=ordered)
+            add_bulk_result(stats, result)
+
+        except BulkWriteError as e:
+            # Partial success: the server reports what was applied + each failed op
+            add_bulk_error(stats, e.details or {}, batch_no)
+
+        except OperationFailure as e:
+            stats["errors"].append({"batch": batch_no, "index": None, "code": e.code, "message": str(e)})
+
+    def upsert_many(self, documents, collection: str, key_fields, batch_size: int = 1000):
+        """
+        Upsert documents matched on key_fields (e.g. ["animal_id", "datetime_intake"])
+        through bulk_write. Returns the same stats dict.
+        """
+        if isinstance(key_fields, str):
+            key_fields = [key_fields]
+
+        operations = (
+            UpdateOne({field: doc.get(field) for field in key_fields}, {"$set": doc}, upsert=True)
+            for doc in documents
+        )
+        return self.bulk_write(operations, collection, batch_size=batch_size)
+
     # -------------------------------
     # READ (NO PAGINATION – DASH HANDLES IT)
     # -------------------------------
@@ -89,6 +384,184 @@ class AnimalShelter:
         except OperationFailure as e:
             print(f"Read failed: {e}")
             return []
+
+    # -------------------------------
+    # STREAM (CURSOR-BASED READ)
+    # -------------------------------
+    def stream(self, query: dict, collection: str, projection: dict = None,
+               batch_size: int = 1000, chunk_size: int = None, keyset: bool = False,
+               after_id=None, before_id=None):
+        """
+        Yield matching documents as the cursor returns them instead of building a list.
+
+        - projection: fields to include/exclude, same as find()
+        - batch_size: documents fetched per round trip to the server
+        - chunk_size: if set, yield lists of up to chunk_size documents instead of single documents
+        - keyset: page through the collection with short _id-ordered queries
+          (_id > last seen _id) instead of one long-lived cursor
+        - after_id / before_id: optional _id range bounds (exclusive)
+        """
+        if not collection:
+            raise Exception("Collection name required.")
+        if batch_size <= 0:
+            raise Exception("batch_size must be positive.")
+
+        if query is None:
+            query = {}
+
+        # Keyset paging needs _id in every document to know where to resume
+        if keyset and projection and projection.get("_id", 1) in (0, False):
+            projection = {k: v for k, v in projection.items() if k != "_id"} or None
+
+        try:
+            if keyset:
+                documents = self._keyset_documents(query, collection, projection, batch_size,
+                                                   after_id, before_id)
+            else:
+                documents = self.database[collection].find(
+                    self._id_range_query(query, after_id, before_id),
+                    projection,
+                    batch_size=batch_size,
+                )
+
+            if not chunk_size:
+                yield from documents
+                return
+
+            chunk = []
+            for document in documents:
+                chunk.append(document)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+        except OperationFailure as e:
+            print(f"Stream failed: {e}")
+            return
+
+    def _keyset_documents(self, query, collection, projection, batch_size, after_id, before_id):
+        """Yield documents page by page, resuming each query after the last _id seen."""
+        last_id = after_id
+        while True:
+            page = list(
+                self.database[collection]
+                .find(self._id_range_query(query, last_id, before_id), projection)
+                .sort("_id", 1)
+                .limit(batch_size)
+            )
+            if not page:
+                return
+
+            yield from page
+
+            if len(page) < batch_size:
+                return
+            last_id = page[-1]["_id"]
+
+    @staticmethod
+    def _id_range_query(query: dict, after_id=None, before_id=None):
+        """Combine a query with an exclusive _id range."""
+        id_range = {}
+        if after_id is not None:
+            id_range["$gt"] = after_id
+        if before_id is not None:
+            id_range["$lt"] = before_id
+
+        if not id_range:
+            return query
+        if not query:
+            return {"_id": id_range}
+        return {"$and": [query, {"_id": id_range}]}
+    # -------------------------------
+    # COUNT
+    # -------------------------------
+    def count(self, collection: str, query: dict = None):
+        """Count documents; uses the fast collection metadata count when no query is given."""
+        if not collection:
+            raise Exception("Collection name required.")
+        try:
+            if not query:
+                return self.database[collection].estimated_document_count()
+            return self.database[collection].count_documents(query)
+
+        except OperationFailure as e:
+            print(f"Count failed: {e}")
+            return 0
+
+    # -------------------------------
+    # MAX VALUE (WATERMARKS)
+    # -------------------------------
+    def max_value(self, collection: str, field: str = "_id"):
+        """Return the largest value of a field in the collection, or None if it is empty."""
+        if not collection:
+            raise Exception("Collection name required.")
+        try:
+            latest = list(
+                self.database[collection]
+                .find({field: {"$exists": True}}, {field: 1})
+                .sort(field, -1)
+                .limit(1)
+            )
+            return latest[0].get(field) if latest else None
+
+        except OperationFailure as e:
+            print(f"Max value lookup failed: {e}")
+            return None
+
+    # -------------------------------
+    # RANGE PARTITIONS
+    # -------------------------------
+    def partition_bounds(self, collection: str, partitions: int, query: dict = None, field: str = "_id"):
+        """
+        Split the documents matching query into up to `partitions` contiguous ranges of field.
+
+        Returns a list of range queries ({field: {"$gte": lo, "$lt": hi}}; the first range
+        has no lower bound and the last no upper bound) that together cover every matching
+        document once. Split points are the field values at evenly spaced ranks, so ranges
+        hold roughly equal document counts. For fields other than _id, a final
+        {field: None} range picks up documents where the field is missing.
+        """
+        if not collection:
+            raise Exception("Collection name required.")
+        if partitions <= 1:
+            return [{}]
+
+        query = query or {}
+        total = self.count(collection, query)
+        step = total // partitions
+        if step == 0:
+            return [{}]
+
+        splits = []
+        for rank in range(step, total, step):
+            if len(splits) == partitions - 1:
+                break
+            point = self.aggregate([
+                {"$match": query if field == "_id" else {"$and": [query, {field: {"$ne": None}}]}},
+                {"$sort": {field: 1}},
+                {"$skip": rank},
+                {"$limit": 1},
+                {"$project": {field: 1}},
+            ], collection)
+            if point and (not splits or point[0][field] != splits[-1]):
+                splits.append(point[0][field])
+
+        bounds = [None] + splits + [None]
+        ranges = []
+        for lo, hi in zip(bounds, bounds[1:]):
+            condition = {} if field == "_id" else {"$ne": None}
+            if lo is not None:
+                condition["$gte"] = lo
+            if hi is not None:
+                condition["$lt"] = hi
+            ranges.append({field: condition} if condition else {})
+
+        if field != "_id":
+            ranges.append({field: None})
+        return ranges
+
     # -------------------------------
     # UPDATE
     # -------------------------------
@@ -121,36 +594,259 @@ class AnimalShelter:
     # Aggregation pipelines
     #-----------------------
 
+    def aggregate(self, pipeline: list, collection: str):
+        """Run a raw aggregation pipeline and return the result documents."""
+        if not collection:
+            raise Exception("Collection name required.")
+        try:
+            return list(self.database[collection].aggregate(pipeline, allowDiskUse=True))
+        except OperationFailure as e:
+            print(f"Aggregation failed: {e}")
+            return []
+
+    def explain(self, query, collection: str):
+        """
+        Return the query planner output for a find filter (dict) or an
+        aggregation pipeline (list), or {} if the server cannot explain it.
+        """
+        if not collection:
+            raise Exception("Collection name required.")
+        try:
+            if isinstance(query, list):
+                return self.database.command(
+                    "explain", {"aggregate": collection, "pipeline": query, "cursor": {}},
+                    verbosity="queryPlanner",
+                )
+            return self.database[collection].find(query).explain()
+        except Exception as e:
+            print(f"Explain failed: {e}")
+            return {}
+
+    def pipeline(self, collection: str):
+        """Start a composable aggregation pipeline bound to this database."""
+        return AggregationBuilder(self, collection)
+
+    def has_rollup(self, name: str):
+        """True when the named rollup collection has been materialized."""
+        try:
+            return self.database[ROLLUP_COLLECTIONS[name]].find_one({}, {"_id": 1}) is not None
+        except OperationFailure:
+            return False
+
     # Breed Distribution pipeline
-    def breed_distribution(self, collection: str = "animals"):
-        """Aggregation pipeline: count animals per breed."""
-        pipeline = [
-            {"$group": {"_id": "$breed", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}}
-        ]
-        return list(self.database[collection].aggregate(pipeline))
+    def breed_distribution(self, collection: str = "animals", use_rollup: bool = True):
+        """Aggregation pipeline: count animals per breed (from the breed rollup when available)."""
+        if use_rollup and self.has_rollup("breed_outcome_year"):
+            return (
+                self.pipeline(ROLLUP_COLLECTIONS["breed_outcome_year"])
+                .group("breed", count={"$sum": "$count"})
+                .sort({"count": -1})
+                .run()
+            )
+        return self.pipeline(collection).count_by("breed").run()
 
     # Age distribution pipeline
-    def age_distribution(self, collection: str = "animals"):
-        """Aggregation pipeline: count animals by age group."""
-        pipeline = [
-            {"$group": {"_id": "$age_group", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}}
-        ]
-        return list(self.database[collection].aggregate(pipeline))
+    def age_distribution(self, collection: str = "animals", use_rollup: bool = True):
+        """Aggregation pipeline: count animals by age group (from the age rollup when available)."""
+        if use_rollup and self.has_rollup("age_group"):
+            return (
+                self.pipeline(ROLLUP_COLLECTIONS["age_group"])
+                .group("age_group", count={"$sum": "$count"})
+                .sort({"count": -1})
+                .run()
+            )
+        return self.pipeline(collection).count_by("age_group").run()
 
     # Rescue ready pipeline
     def rescue_ready(self, collection: str = "animals"):
         """Aggregation pipeline: animals marked rescue-ready."""
-        pipeline = [
-            {"$match": {"rescue_ready": True}}
-        ]
-        return list(self.database[collection].aggregate(pipeline))
+        return self.pipeline(collection).match({"rescue_ready": True}).run()
 
     # Average days in Shelter pipeline
-    def avg_days_in_shelter(self, collection: str = "animals"):
-        pipeline = [
-            {"$group": {"_id": None, "avg_days": {"$avg": "$days_in_shelter"}}}
+    def avg_days_in_shelter(self, collection: str = "animals", use_rollup: bool = True):
+        if use_rollup and self.has_rollup("days_in_shelter"):
+            result = (
+                self.pipeline(ROLLUP_COLLECTIONS["days_in_shelter"])
+                .group(None, days_sum={"$sum": "$days_sum"}, days_count={"$sum": "$days_count"})
+                .run()
+            )
+            if not result or not result[0]["days_count"]:
+                return None
+            return result[0]["days_sum"] / result[0]["days_count"]
+
+        result = (
+            self.pipeline(collection)
+            .group(None, avg_days={"$avg": "$days_in_shelter"})
+            .run()
+        )
+        return result[0]["avg_days"] if result else None
+
+
+    #-----------------------
+    # Materialized rollups
+    #-----------------------
+    def _stage_batch(self, documents: list):
+        """Insert documents into the staging collection under a fresh batch id."""
+        batch = ObjectId()
+        staged = [
+            {"_key": doc["_id"], "_batch": batch, **{k: v for k, v in doc.items() if k != "_id"}}
+            for doc in documents
         ]
-        result = list(self.database[collection].aggregate(pipeline))
-        return result[0]["avg_days"] if result else None
\ No newline at end of file
+        self.database[STAGING_COLLECTION].insert_many(staged)
+        return batch
+
+    def _staged_pipeline(self, batch):
+        """Pipeline stages that turn a staged batch back into its original documents."""
+        return [
+            {"$match": {"_batch": batch}},
+            {"$addFields": {"_id": "$_key"}},
+            {"$project": {"_key": 0, "_batch": 0}},
+        ]
+
+    def set_documents(self, documents: list, collection: str, delete_ids=()):
+        """
+        Replace documents by _id (inserting missing ones) and delete delete_ids, in one
+        unordered bulk_write. Writing the same documents again changes nothing, which
+        makes it safe for several workers applying the same rollup change.
+        """
+        if not collection:
+            raise Exception("Collection name required.")
+
+        operations = [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in documents]
+        operations += [DeleteOne({"_id": _id}) for _id in delete_ids]
+        if not operations:
+            return 0
+
+        stats = self.bulk_write(operations, collection)
+        if stats["errors"]:
+            raise Exception(f"Writing {collection} failed: {stats['errors'][0]['message']}")
+        return len(operations)
+
+    def replace_collection(self, documents: list, collection: str):
+        """Atomically replace a collection's contents with documents (staging + $out)."""
+        if not collection:
+            raise Exception("Collection name required.")
+        if not documents:
+            self.database[collection].delete_many({})
+            return 0
+
+        batch = self._stage_batch(documents)
+        try:
+            self.database[STAGING_COLLECTION].aggregate(
+                self._staged_pipeline(batch) + [{"$out": collection}]
+            )
+            return len(documents)
+        finally:
+            self.database[STAGING_COLLECTION].delete_many({"_batch": batch})
+
+
+class AggregationBuilder:
+    """
+    Composable MongoDB aggregation pipeline.
+
+    Each method appends a stage and returns the builder, so pipelines read top to bottom:
+
+        db.pipeline("outcomes").match_outcome("Adoption").count_by("outcome_type", "breed").run()
+
+    Builders without a shelter (AggregationBuilder()) only build stage lists,
+    e.g. for $facet branches.
+    """
+
+    def __init__(self, shelter=None, collection: str = None):
+        self.shelter = shelter
+        self.collection = collection
+        self.stages = []
+
+    # -------------------------------
+    # Core stages
+    # -------------------------------
+    def stage(self, stage: dict):
+        """Append a raw stage."""
+        self.stages.append(stage)
+        return self
+
+    def match(self, query: dict):
+        """Append a $match stage (skipped when the query is empty)."""
+        if query:
+            self.stages.append({"$match": query})
+        return self
+
+    def group(self, by, **accumulators):
+        """
+        Append a $group stage.
+
+        by: None (one group), a field name, or a list of field names.
+        accumulators: output field -> accumulator, e.g. count={"$sum": 1}.
+        """
+        if by is None:
+            key = None
+        elif isinstance(by, str):
+            key = f"${by}"
+        else:
+            key = {field: f"${field}" for field in by}
+
+        self.stages.append({"$group": {"_id": key, **accumulators}})
+        return self
+
+    def count_by(self, *fields):
+        """Count documents per value (or value combination) of fields, largest first."""
+        by = fields[0] if len(fields) == 1 else list(fields)
+        return self.group(by, count={"$sum": 1}).sort({"count": -1})
+
+    def sort(self, spec: dict):
+        self.stages.append({"$sort": spec})
+        return self
+
+    def limit(self, n: int):
+        self.stages.append({"$limit": n})
+        return self
+
+    def project(self, spec: dict):
+        self.stages.append({"$project": spec})
+        return self
+
+    def facet(self, **branches):
+        """Append a $facet stage; each branch is a builder or a list of stages."""
+        self.stages.append({
+            "$facet": {
+                name: branch.build() if isinstance(branch, AggregationBuilder) else list(branch)
+                for name, branch in branches.items()
+            }
+        })
+        return self
+
+    # -------------------------------
+    # Dashboard filters
+    # -------------------------------
+    def match_outcome(self, outcome_type, field: str = "outcome_type"):
+        """Match one outcome type; "all"/None matches everything (same as the adoption dropdown)."""
+        if outcome_type and outcome_type != "all":
+            self.match({field: outcome_type})
+        return self
+
+    def match_breeds(self, keywords, max_age_weeks=None, breed_field: str = "breed",
+                     age_field: str = "age_upon_outcome_in_weeks"):
+        """
+        Match breeds containing any keyword (case-insensitive) and, optionally,
+        an age limit in weeks (same rule as the rescue categories).
+        """
+        query = {}
+        if keywords:
+            pattern = "|".join(re.escape(k) for k in keywords)
+            query[breed_field] = {"$regex": pattern, "$options": "i"}
+        if max_age_weeks is not None:
+            query[age_field] = {"$lte": max_age_weeks}
+        return self.match(query)
+
+    # -------------------------------
+    # Output
+    # -------------------------------
+    def build(self):
+        """Return a copy of the stage list."""
+        return list(self.stages)
+
+    def run(self):
+        """Execute the pipeline on the bound shelter/collection."""
+        if self.shelter is None or not self.collection:
+            raise Exception("Pipeline is not bound to a collection.")
+        return self.shelter.aggregate(self.build(), self.collection)
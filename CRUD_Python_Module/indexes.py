@@ -0,0 +1,317 @@
+# indexes.py – declared MongoDB indexes, reconciled once per deploy
+#
+#   python CRUD_Python_Module/indexes.py                  create/rebuild what is missing
+#   python CRUD_Python_Module/indexes.py --dry-run        only show what would change
+#   python CRUD_Python_Module/indexes.py --explain        also report collection scans
+import argparse
+import os
+import sys
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+from CRUD_Python_Module.crud import AggregationBuilder, AnimalShelter, ROLLUP_COLLECTIONS
+from etl.Data_Loader import DataLoader
+from etl.logger import get_logger
+from etl.rescue import RESCUE_CATEGORIES, RESCUE_MASK_COLUMN
+
+
+# ---------------------------------------------------------
+# Declared indexes: collection -> list of
+#   {"name": ..., "keys": [(field, direction), ...], "options": {...}}
+# Shaped after the queries that actually run (see QUERY_SHAPES below).
+# Partial indexes only hold the documents their query can match, e.g. raw
+# "Animal ID" documents or outcomes that have an outcome_type.
+# ---------------------------------------------------------
+INDEXES = {
+    "intakes": [
+        # DataLoader.animal_query (incremental ETL / live watcher), per-animal history
+        {"name": "animal_id_datetime_intake", "keys": [("animal_id", 1), ("datetime_intake", 1)]},
+        {
+            "name": "raw_animal_id",
+            "keys": [("Animal ID", 1)],
+            "options": {"partialFilterExpression": {"Animal ID": {"$exists": True}}},
+        },
+    ],
+    "outcomes": [
+        {"name": "animal_id_datetime_outcome", "keys": [("animal_id", 1), ("datetime_outcome", 1)]},
+        {
+            "name": "raw_animal_id",
+            "keys": [("Animal ID", 1)],
+            "options": {"partialFilterExpression": {"Animal ID": {"$exists": True}}},
+        },
+        # Chart pushdown: adoption bar ($match outcome_type, group by outcome_type + breed)
+        {
+            "name": "outcome_type_breed",
+            "keys": [("outcome_type", 1), ("breed", 1)],
+            "options": {"partialFilterExpression": {"outcome_type": {"$exists": True}}},
+        },
+        # Chart pushdown: rescue pie (age limit + breed keywords, breed read from the index)
+        {
+            "name": "age_weeks_breed",
+            "keys": [("age_upon_outcome_in_weeks", 1), ("breed", 1)],
+            "options": {"partialFilterExpression": {"age_upon_outcome_in_weeks": {"$exists": True}}},
+        },
+    ],
+    ROLLUP_COLLECTIONS["breed_outcome_year"]: [
+        {"name": "outcome_type_breed", "keys": [("outcome_type", 1), ("breed", 1)]},
+    ],
+    ROLLUP_COLLECTIONS["rescue_breed"]: [
+        {"name": "rescue_mask_breed", "keys": [(RESCUE_MASK_COLUMN, 1), ("breed", 1)]},
+    ],
+    # Legacy flat collection used by the CRUD defaults (was indexed in AnimalShelter.__init__)
+    "animals": [
+        {"name": "animal_type_1", "keys": [("animal_type", 1)]},
+        {"name": "breed_1", "keys": [("breed", 1)]},
+        {"name": "outcome_type_1", "keys": [("outcome_type", 1)]},
+    ],
+}
+
+# Index options compared when deciding whether an existing index matches its declaration
+COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds", "collation")
+
+
+def _rescue_match(category):
+    _, keywords, age_limit = RESCUE_CATEGORIES[category]
+    return AggregationBuilder().match_breeds(keywords, age_limit * 52)
+
+
+def _mask_values(category):
+    bit = RESCUE_CATEGORIES[category][0]
+    all_bits = sum(b for b, _, _ in RESCUE_CATEGORIES.values())
+    return [m for m in range(all_bits + 1) if m & bit]
+
+
+# ---------------------------------------------------------
+# Query shapes explained by --explain:
+#   (label, collection, find filter or pipeline, full scan expected)
+# Built with the same helpers the ETL and dashboard use, so they stay in step.
+# ---------------------------------------------------------
+_SAMPLE_CATEGORY = next(iter(RESCUE_CATEGORIES))
+
+QUERY_SHAPES = [
+    ("ETL full extract", "intakes", {}, True),
+    ("ETL full extract", "outcomes", {}, True),
+    ("ETL _id range partition", "intakes", {"_id": {"$gte": ObjectId("0" * 24)}}, False),
+    ("ETL animal history", "intakes", DataLoader.animal_query(["A000000"]), False),
+    ("ETL animal history", "outcomes", DataLoader.animal_query(["A000000"]), False),
+    (
+        "Chart adoption bar",
+        "outcomes",
+        AggregationBuilder().match_outcome("Adoption").count_by("outcome_type", "breed").build(),
+        False,
+    ),
+    (
+        "Chart rescue pie",
+        "outcomes",
+        _rescue_match(_SAMPLE_CATEGORY).count_by("breed").build(),
+        False,
+    ),
+    (
+        "Rollup adoption bar",
+        ROLLUP_COLLECTIONS["breed_outcome_year"],
+        AggregationBuilder().match_outcome("Adoption")
+        .group(["outcome_type", "breed"], count={"$sum": "$count"}).build(),
+        False,
+    ),
+    (
+        "Rollup rescue pie",
+        ROLLUP_COLLECTIONS["rescue_breed"],
+        AggregationBuilder().match({RESCUE_MASK_COLUMN: {"$in": _mask_values(_SAMPLE_CATEGORY)}})
+        .group("breed", count={"$sum": "$count"}).build(),
+        False,
+    ),
+]
+
+
+class IndexManager:
+    """
+    Reconcile the declared INDEXES with what a database actually has.
+
+    - missing indexes are created; an index whose keys or options differ from its
+      declaration is dropped and rebuilt (an equal index under another name is kept)
+    - reconcile() is idempotent: a second run reports every index as "ok"
+    - undeclared indexes are only dropped with drop_unmanaged=True
+    - explain() runs QUERY_SHAPES through the query planner and reports collection scans
+    """
+
+    def __init__(self, db, logger, indexes=None):
+        self.db = db
+        self.logger = logger
+        self.indexes = INDEXES if indexes is None else indexes
+
+    # -------------------------------
+    # Reconcile
+    # -------------------------------
+    def plan(self, drop_unmanaged=False):
+        """Return the actions reconcile() would take, without changing anything."""
+        return self.reconcile(drop_unmanaged=drop_unmanaged, dry_run=True)
+
+    def reconcile(self, drop_unmanaged=False, dry_run=False):
+        """Bring every declared collection's indexes in line; returns a list of actions."""
+        actions = []
+        for collection, specs in self.indexes.items():
+            actions.extend(self._reconcile_collection(collection, specs, drop_unmanaged, dry_run))
+
+        changed = [a for a in actions if a["action"] != "ok"]
+        self.logger.info(
+            f"Indexes: {len(actions) - len(changed)} up to date, {len(changed)} "
+            f"{'to change' if dry_run else 'changed'}."
+        )
+        return actions
+
+    def _reconcile_collection(self, collection, specs, drop_unmanaged, dry_run):
+        coll = self.db.database[collection]
+        existing = coll.index_information()
+        actions = []
+        kept = {"_id_"}
+
+        for spec in specs:
+            keys = _key_list(spec["keys"])
+            options = spec.get("options", {})
+            match = existing.get(spec["name"])
+
+            if match is None:
+                # Same definition under another name (e.g. created by hand): keep it
+                alias = next(
+                    (name for name, info in existing.items()
+                     if _key_list(info["key"]) == keys and _options(info) == _options(options)),
+                    None,
+                )
+                if alias is not None:
+                    kept.add(alias)
+                    actions.append(self._action(collection, spec["name"], "ok", f"present as '{alias}'"))
+                    continue
+                action = self._action(collection, spec["name"], "create")
+            elif _key_list(match["key"]) == keys and _options(match) == _options(options):
+                kept.add(spec["name"])
+                actions.append(self._action(collection, spec["name"], "ok"))
+                continue
+            else:
+                action = self._action(collection, spec["name"], "rebuild", "keys or options changed")
+
+            kept.add(spec["name"])
+            actions.append(action)
+            if dry_run:
+                continue
+            try:
+                if action["action"] == "rebuild":
+                    coll.drop_index(spec["name"])
+                coll.create_index(keys, name=spec["name"], **options)
+            except OperationFailure as e:
+                action.update(action="error", detail=str(e))
+                self.logger.error(f"Indexes: {collection}.{spec['name']} failed: {e}")
+
+        for name in existing:
+            if name in kept:
+                continue
+            if not drop_unmanaged:
+                actions.append(self._action(collection, name, "unmanaged"))
+                continue
+            actions.append(self._action(collection, name, "drop"))
+            if not dry_run:
+                coll.drop_index(name)
+
+        return actions
+
+    def _action(self, collection, name, action, detail=""):
+        if action not in ("ok", "unmanaged"):
+            self.logger.info(f"Indexes: {action} {collection}.{name} {detail}".rstrip())
+        return {"collection": collection, "index": name, "action": action, "detail": detail}
+
+    # -------------------------------
+    # Explain
+    # -------------------------------
+    def explain(self, shapes=None):
+        """
+        Explain each query shape and report its winning plan.
+
+        Returns one row per shape with the plan stages, the indexes used and
+        whether it scans the whole collection; unexpected scans are logged as warnings.
+        """
+        report = []
+        for label, collection, query, full_scan in (shapes or QUERY_SHAPES):
+            plan = self.db.explain(query, collection)
+            stages, index_names = set(), set()
+            _walk_plans(plan, stages, index_names)
+
+            row = {
+                "query": label,
+                "collection": collection,
+                "stages": sorted(stages),
+                "indexes": sorted(index_names),
+                "collscan": "COLLSCAN" in stages,
+                "expected": full_scan,
+                "explained": bool(plan),
+            }
+            report.append(row)
+
+            if not plan:
+                self.logger.warning(f"Explain: {label} on '{collection}' could not be explained.")
+            elif row["collscan"] and not full_scan:
+                self.logger.warning(f"Explain: {label} on '{collection}' scans the whole collection.")
+            else:
+                self.logger.info(
+                    f"Explain: {label} on '{collection}' uses {', '.join(row['indexes']) or ', '.join(row['stages'])}."
+                )
+        return report
+
+
+def _key_list(keys):
+    """Normalize an index key spec (list of pairs, SON or dict) to [(field, int direction)]."""
+    items = keys.items() if hasattr(keys, "items") else keys
+    return [(field, int(direction) if isinstance(direction, (int, float)) else direction)
+            for field, direction in items]
+
+
+def _options(info):
+    return {k: info[k] for k in COMPARED_OPTIONS if info.get(k) is not None}
+
+
+def _walk_plans(node, stages, index_names, in_plan=False):
+    """Collect stage and index names from every winningPlan inside an explain document."""
+    if isinstance(node, dict):
+        if in_plan and "stage" in node:
+            stages.add(node["stage"])
+            if node.get("indexName"):
+                index_names.add(node["indexName"])
+        for key, value in node.items():
+            if key == "rejectedPlans":
+                continue
+            _walk_plans(value, stages, index_names, in_plan or key == "winningPlan")
+    elif isinstance(node, list):
+        for value in node:
+            _walk_plans(value, stages, index_names, in_plan)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconcile the declared MongoDB indexes.")
+    parser.add_argument("--dry-run", action="store_true", help="show the changes without applying them")
+    parser.add_argument("--drop-unmanaged", action="store_true", help="drop indexes that are not declared")
+    parser.add_argument("--explain", action="store_true", help="report collection scans of the known queries")
+    args = parser.parse_args(argv)
+
+    logger = get_logger("indexes")
+    manager = IndexManager(AnimalShelter(), logger)
+
+    actions = manager.reconcile(drop_unmanaged=args.drop_unmanaged, dry_run=args.dry_run)
+    for action in actions:
+        print(f"{action['action']:<10} {action['collection']}.{action['index']} {action['detail']}".rstrip())
+
+    if args.explain:
+        for row in manager.explain():
+            status = "COLLSCAN" if row["collscan"] else "ok"
+            if row["collscan"] and row["expected"]:
+                status = "COLLSCAN (expected)"
+            elif not row["explained"]:
+                status = "n/a"
+            print(f"{status:<20} {row['query']} [{row['collection']}] {', '.join(row['indexes'])}".rstrip())
+
+    return 1 if any(a["action"] == "error" for a in actions) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
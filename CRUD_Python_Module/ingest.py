@@ -0,0 +1,230 @@
+# ingest.py – stream raw Austin Animal Center CSV exports into MongoDB
+#
+#   python CRUD_Python_Module/ingest.py intakes  Austin_Animal_Center_Intakes.csv
+#   python CRUD_Python_Module/ingest.py outcomes Austin_Animal_Center_Outcomes.csv --writers 8
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+from bson import ObjectId
+
+from CRUD_Python_Module.crud import AnimalShelter
+from etl.Data_Loader import standardize_column
+from etl.logger import get_logger
+from etl.state import DEFAULT_STATE_DIR
+
+
+# Raw export columns renamed to what DataLoader / the ETL expect (after standardizing)
+COLUMN_RENAMES = {
+    "intakes": {"datetime": "datetime_intake"},
+    "outcomes": {"datetime": "datetime_outcome"},
+}
+
+# Columns parsed as datetimes (stored as BSON dates)
+DATETIME_COLUMNS = {"datetime_intake", "datetime_outcome", "date_of_birth"}
+
+# Duplicate key: the row was already written by an earlier (interrupted) run
+DUPLICATE_KEY = 11000
+
+
+class CsvIngestor:
+    """
+    Stream a CSV export into a MongoDB collection.
+
+    - the file is parsed in chunks (never fully in memory)
+    - column names are standardized like DataLoader; animal_id and datetimes are coerced
+    - chunks are written by a pool of writer threads with batched, unordered inserts
+    - a checkpoint records how many leading rows are safely written (up to the first
+      chunk with write errors), so a rerun resumes there; every row gets a deterministic ObjectId, so rows that were
+      written after the checkpoint are recognized as duplicates instead of copied twice
+    """
+
+    def __init__(self, db, logger, collection, chunk_size=20000, batch_size=1000,
+                 writers=4, state_dir=DEFAULT_STATE_DIR):
+        if collection not in COLUMN_RENAMES:
+            raise ValueError(f"collection must be one of {list(COLUMN_RENAMES)}")
+
+        self.db = db
+        self.logger = logger
+        self.collection = collection
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.writers = writers
+        self.state_dir = state_dir
+
+    # -------------------------------
+    # Checkpoints
+    # -------------------------------
+    def checkpoint_path(self, csv_path):
+        name = os.path.basename(csv_path)
+        return os.path.join(self.state_dir, f"ingest-{self.collection}-{name}.json")
+
+    def load_checkpoint(self, csv_path):
+        """Return the stored checkpoint if it belongs to this exact file, else a fresh one."""
+        stat = os.stat(csv_path)
+        fresh = {
+            "file": os.path.abspath(csv_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "rows_done": 0,
+            "started_at": int(time.time()),
+        }
+
+        path = self.checkpoint_path(csv_path)
+        if not os.path.exists(path):
+            return fresh
+
+        with open(path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+
+        if checkpoint.get("size") != stat.st_size or checkpoint.get("mtime") != stat.st_mtime:
+            self.logger.info("Ingest: CSV changed since the last checkpoint, starting over.")
+            return fresh
+        return checkpoint
+
+    def save_checkpoint(self, csv_path, checkpoint):
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = self.checkpoint_path(csv_path)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    # -------------------------------
+    # Parsing
+    # -------------------------------
+    def prepare_chunk(self, chunk, first_row, checkpoint):
+        """Normalize one parsed chunk into BSON-ready documents."""
+        chunk.columns = [standardize_column(col) for col in chunk.columns]
+        chunk = chunk.rename(columns=COLUMN_RENAMES[self.collection])
+
+        # Deterministic _id: ingest start time + file hash + row number, so reruns hit
+        # duplicate keys. Ids follow row order, but with several writers chunks land out
+        # of order: an ETL run during the ingest can see rows arrive below its _id
+        # watermark, which run_incremental detects by count and answers with a rebuild
+        file_tag = zlib.crc32(checkpoint["file"].encode("utf-8")) & 0xFFFFFF
+        prefix = checkpoint["started_at"].to_bytes(4, "big") + file_tag.to_bytes(3, "big")
+        chunk["_id"] = [
+            ObjectId(prefix + (first_row + i).to_bytes(5, "big")) for i in range(len(chunk))
+        ]
+
+        if "animal_id" in chunk.columns:
+            chunk = chunk.dropna(subset=["animal_id"])
+            chunk["animal_id"] = chunk["animal_id"].astype(str).str.strip()
+
+        for col in DATETIME_COLUMNS & set(chunk.columns):
+            chunk[col] = pd.to_datetime(chunk[col], errors="coerce")
+
+        # Missing values become nulls instead of NaN / NaT
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        return chunk.to_dict("records")
+
+    # -------------------------------
+    # Ingest
+    # -------------------------------
+    def ingest(self, csv_path, restart=False):
+        """Stream csv_path into the collection; returns a summary dict."""
+        checkpoint = self.load_checkpoint(csv_path)
+        if restart:
+            checkpoint["rows_done"] = 0
+
+        start_row = checkpoint["rows_done"]
+        if start_row:
+            self.logger.info(f"Ingest: Resuming {csv_path} after row {start_row}.")
+
+        summary = {"rows": 0, "inserted": 0, "duplicates": 0, "errors": [], "chunks": 0}
+        lock = threading.Lock()
+        finished = {}       # chunk first_row -> rows in chunk
+        in_flight = threading.BoundedSemaphore(self.writers * 2)
+        started = time.perf_counter()
+
+        def write(documents, first_row, rows):
+            try:
+                stats = self.db.bulk_write(documents, self.collection, batch_size=self.batch_size)
+                duplicates = [e for e in stats["errors"] if e["code"] == DUPLICATE_KEY]
+                errors = [e for e in stats["errors"] if e["code"] != DUPLICATE_KEY]
+
+                with lock:
+                    summary["inserted"] += stats["inserted"]
+                    summary["duplicates"] += len(duplicates)
+                    summary["errors"].extend({**e, "first_row": first_row} for e in errors)
+
+                    # Advance the checkpoint over every contiguous chunk written without
+                    # errors; a failed chunk holds it back so a rerun writes it again
+                    if not errors:
+                        finished[first_row] = rows
+                        while checkpoint["rows_done"] in finished:
+                            checkpoint["rows_done"] += finished.pop(checkpoint["rows_done"])
+                        self.save_checkpoint(csv_path, checkpoint)
+            finally:
+                in_flight.release()
+
+        reader = pd.read_csv(
+            csv_path,
+            chunksize=self.chunk_size,
+            dtype=str,
+            skiprows=range(1, start_row + 1),
+            keep_default_na=True,
+        )
+
+        with ThreadPoolExecutor(max_workers=self.writers, thread_name_prefix="ingest-writer") as pool:
+            first_row = start_row
+            futures = []
+            for chunk in reader:
+                rows = len(chunk)
+                documents = self.prepare_chunk(chunk, first_row, checkpoint)
+
+                # Bounded number of parsed chunks waiting for a writer
+                in_flight.acquire()
+                futures.append(pool.submit(write, documents, first_row, rows))
+
+                summary["rows"] += rows
+                summary["chunks"] += 1
+                first_row += rows
+
+            for future in futures:
+                future.result()
+
+        summary["seconds"] = time.perf_counter() - started
+        summary["rows_per_sec"] = summary["rows"] / summary["seconds"] if summary["seconds"] else 0.0
+        summary["rows_done"] = checkpoint["rows_done"]
+
+        self.logger.info(
+            f"Ingest: {summary['rows']} rows from {csv_path} -> {self.collection}: "
+            f"{summary['inserted']} inserted, {summary['duplicates']} already present, "
+            f"{len(summary['errors'])} errors, {summary['rows_per_sec']:.0f} rows/s."
+        )
+        return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream an Austin Animal Center CSV export into MongoDB.")
+    parser.add_argument("collection", choices=sorted(COLUMN_RENAMES), help="target collection")
+    parser.add_argument("csv_path", help="path to the CSV export")
+    parser.add_argument("--chunk-size", type=int, default=20000, help="rows parsed per chunk")
+    parser.add_argument("--batch-size", type=int, default=1000, help="documents per insert batch")
+    parser.add_argument("--writers", type=int, default=4, help="parallel writer threads")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from row 0")
+    args = parser.parse_args(argv)
+
+    logger = get_logger("ingest")
+    db = AnimalShelter()
+
+    ingestor = CsvIngestor(
+        db, logger, args.collection,
+        chunk_size=args.chunk_size, batch_size=args.batch_size, writers=args.writers,
+    )
+    summary = ingestor.ingest(args.csv_path, restart=args.restart)
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
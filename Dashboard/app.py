@@ -10,10 +10,14 @@ from dash import Dash
 from CRUD_Python_Module.crud import AnimalShelter
 from etl.logger import get_logger
 from etl.Data_Loader import DataLoader
+from etl.columns import dashboard_manifest, source_projections
 from etl.ETL_Manager import ETLManager
+from etl.shared import SharedDataset
+from etl.watcher import ChangeWatcher
 
 from layout import create_layout
 from callbacks import register_callbacks
+from dataset import DatasetRefresher, LiveDataset
 
 
 # -------------------------------------------------------------
@@ -25,33 +29,83 @@ logger = get_logger("dashboard")
 # Secure CRUD class (reads credentials from .env)
 db = AnimalShelter()
 
-# Data loader + ETL manager
-loader = DataLoader(db=db, logger=logger)
+# Data loader + ETL manager; only the fields the dashboard uses (plus the visible
+# table columns, DASHBOARD_TABLE_COLUMNS in .env) are read from MongoDB
+loader = DataLoader(db=db, logger=logger, projections=source_projections(dashboard_manifest()))
 etl_manager = ETLManager(db=db, logger=logger, loader=loader)
 
-# Extract both collections
-intakes_df, outcomes_df = etl_manager.extraction()
-
-# Transform → merge → clean
-merged_df = etl_manager.transform(intakes_df, outcomes_df)
-df = etl_manager.load_to_dashboard(merged_df)
+# SHARED_DATASET=1 in .env (multi-worker deployments, e.g. gunicorn app:server):
+# one worker builds the dataset into a memory-mapped Arrow file and every worker
+# attaches to it read-only, so the frame is held once per machine, not per worker
+if os.getenv("SHARED_DATASET", "0") == "1":
+    def build_shared():
+        frame = etl_manager.load_cached(background=False)
+        return frame, etl_manager.dataset_version or "static"
+
+    shared = SharedDataset()
+    df, shared_meta = shared.attach_or_publish(build_shared)
+    etl_manager.dataset_version = shared_meta["version"]
+else:
+    # Serve the newest ETL snapshot (etl_state/) straight away; a stale snapshot
+    # is rebuilt incrementally in the background, a missing one is built now
+    shared = None
+    df = etl_manager.load_cached()
 
 # Remove _id if present
 if "_id" in df.columns:
     df = df.drop(columns=["_id"])
 
+# Callbacks read the dataset through this holder so it can be hot-swapped
+dataset = LiveDataset(df, etl_manager.dataset_version or "static")
+
+# DATA_REFRESH_SECONDS in .env (0 disables): re-run the ETL incrementally in the
+# background and swap the new frame in; DATA_CHANGE_STREAM=1 also refreshes as
+# soon as MongoDB reports a change. Incremental runs miss in-place updates, so
+# every DATA_FULL_REBUILD_SECONDS (default daily, 0 disables) the dataset is rebuilt
+refresh_seconds = int(os.getenv("DATA_REFRESH_SECONDS", "300"))
+if refresh_seconds > 0:
+    refresher = DatasetRefresher(
+        etl_manager,
+        dataset,
+        logger,
+        interval=refresh_seconds,
+        shared=shared,
+        watch=os.getenv("DATA_CHANGE_STREAM", "0") == "1",
+        full_interval=int(os.getenv("DATA_FULL_REBUILD_SECONDS", "86400")),
+    ).start()
+
+# DATA_LIVE=1 in .env (single-process mode): apply source inserts/deletes per
+# animal within seconds, via change streams or _id polling (DATA_LIVE_MODE)
+if os.getenv("DATA_LIVE", "0") == "1" and shared is None:
+    watcher = ChangeWatcher(
+        etl_manager,
+        logger,
+        current=dataset.current,
+        on_update=dataset.swap,
+        mode=os.getenv("DATA_LIVE_MODE", "auto"),
+        poll_interval=float(os.getenv("DATA_LIVE_POLL_SECONDS", "5")),
+    ).start()
+
 
 # -------------------------------------------------------------
 # DASH APP SETUP
 # -------------------------------------------------------------
 
 app = Dash(__name__)
+server = app.server  # WSGI entry point for gunicorn
+
+# Layout (built per page load, so new visitors get the current dataset's options)
+def serve_layout():
+    frame, version = dataset.current()
+    return create_layout(frame, version)
+
 
-# Layout
-app.layout = create_layout(df)
+app.layout = serve_layout
 
 # Callbacks (must come after app + layout)
-register_callbacks(app, df, logger)
+# CHART_PUSHDOWN=1 in .env: chart counts are read from the ETL rollups in MongoDB
+chart_db = db if os.getenv("CHART_PUSHDOWN", "0") == "1" else None
+register_callbacks(app, dataset, logger, db=chart_db)
 
 
 # -------------------------------------------------------------
@@ -0,0 +1,66 @@
+# cache.py – bounded LRU/TTL cache for dashboard filter results
+import threading
+import time
+from collections import OrderedDict
+
+
+class FilterCache:
+    """
+    Thread-safe LRU cache with a time-to-live, used to memoize callback filter
+    results (row positions, chart counts) across requests.
+
+    Keys should start with the dataset version so results computed for an old
+    ETL snapshot are never served for a new one. Each gunicorn worker keeps its
+    own instance; version-prefixed keys keep every worker consistent.
+    """
+
+    def __init__(self, maxsize=64, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            # Computed outside the lock so slow filters never block other keys
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, keep_version=None):
+        """Drop every entry, or every entry whose key is not prefixed by keep_version."""
+        with self._lock:
+            if keep_version is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] != keep_version]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
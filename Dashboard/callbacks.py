@@ -1,6 +1,7 @@
 # callbacks.py
-from dash.dependencies import Input, Output
-from dash import dcc, html
+from dash.dependencies import Input, Output, State
+from dash import dcc, html, ctx
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 import pandas as pd
 import dash_leaflet as dl
@@ -9,89 +10,217 @@ from helpers import (
     get_breed_column,
     get_outcome_type_column,
     get_age_column,
+    apply_table_filter,
+    apply_table_sort,
+    paginate,
+    record_columns,
+    sort_key,
     DEFAULT_LOCATION
 )
+from cache import FilterCache
+from dataset import LiveDataset
+from layout import outcome_options, table_columns
+from CRUD_Python_Module.crud import ROLLUP_COLLECTIONS
+from etl.rescue import RESCUE_CATEGORIES, RESCUE_MASK_COLUMN, category_mask, rescue_bitmask
 
 
-def register_callbacks(app, df, logger):
+def register_callbacks(app, df, logger, dataset_version="static", cache=None, db=None):
+    """
+    Wire up all dashboard callbacks.
+
+    df is a DataFrame or a LiveDataset; with a LiveDataset every callback reads the
+    (frame, version) pair current when it starts, so hot reloads never mix datasets.
+
+    If db (an AnimalShelter) is given, chart counts are computed by MongoDB
+    aggregations on the ETL's rollup collections whenever no table column filter
+    is active (and from the local frame while a rollup is missing).
+    """
+    dataset = df if isinstance(df, LiveDataset) else LiveDataset(df, dataset_version)
+
+    # Memoized filter results, keyed by dataset version + filter values;
+    # entries of a replaced dataset are dropped as soon as it is swapped out
+    cache = cache or FilterCache()
+    dataset.subscribe(lambda version: cache.invalidate(keep_version=version))
+
+    def select_rows(dff, filter_query=None, sort_by=None):
+        """Apply the table filter/sort and return the matching row positions."""
+        dff = apply_table_filter(dff, filter_query)
+        dff = apply_table_sort(dff, sort_by)
+        return dff.index.to_numpy()
+
+    # =============================================================
+    # MONGODB CHART PUSHDOWN (used when a db is passed in)
+    # =============================================================
+    # Only the rollup collections the ETL maintains from the served dataset hold the
+    # same rows as the table; the raw source collections are neither deduplicated
+    # nor joined, so without a rollup the charts are counted from the local frame.
+    def pushdown(version, rollup):
+        """True when chart counts can come from this MongoDB rollup."""
+        if db is None:
+            return False
+        return cache.get_or_compute((version, "has-rollup", rollup), lambda: db.has_rollup(rollup))
+
+    def mongo_breed_counts(category, breed_col):
+        """Breed counts for one rescue category, from the rescue_breed rollup."""
+        # Small rollup maintained by the ETL: (breed, rescue_mask) -> count
+        pipeline = db.pipeline(ROLLUP_COLLECTIONS["rescue_breed"])
+        if category in RESCUE_CATEGORIES:
+            bit = RESCUE_CATEGORIES[category][0]
+            all_bits = sum(b for b, _, _ in RESCUE_CATEGORIES.values())
+            # Every mask value with this category's bit set (index-friendly $in)
+            pipeline.match({RESCUE_MASK_COLUMN: {"$in": [m for m in range(all_bits + 1) if m & bit]}})
+        breeds = (
+            pipeline.group("breed", count={"$sum": "$count"})
+            .match({"count": {"$gt": 0}})
+            .sort({"count": -1})
+            .run()
+        )
+
+        logger.info(f"[Mongo] rescue pie '{category}': {len(breeds)} breeds")
+        return pd.DataFrame(
+            [{breed_col: d["_id"], "count": d["count"]} for d in breeds],
+            columns=[breed_col, "count"],
+        )
+
+    def mongo_outcome_counts(outcome_filter, outcome_col, breed_col):
+        """Outcome x breed counts for the adoption chart, from the breed_outcome_year rollup."""
+        # Small rollup maintained by the ETL: (breed, outcome_type, year) -> count
+        docs = (
+            db.pipeline(ROLLUP_COLLECTIONS["breed_outcome_year"])
+            .match_outcome(outcome_filter)
+            .group(["outcome_type", "breed"], count={"$sum": "$count"})
+            .match({"count": {"$gt": 0}})
+            .sort({"count": -1})
+            .run()
+        )
+        logger.info(f"[Mongo] adopt bar '{outcome_filter}': {len(docs)} groups")
+        return pd.DataFrame(
+            [
+                {
+                    outcome_col: d["_id"].get("outcome_type"),
+                    breed_col: d["_id"].get("breed"),
+                    "count": d["count"],
+                }
+                for d in docs
+            ],
+            columns=[outcome_col, breed_col, "count"],
+        )
+
     # =============================================================
     # TAB 1 – RESCUE READY (FILTER + TABLE)
     # =============================================================
-    @app.callback(
-        [Output("datatable-rescue", "data"),
-         Output("datatable-rescue", "selected_rows")],
-        Input("filter-type-rescue", "value"),
-    )
-    def update_rescue_table(filter_type):
-        logger.info(f"[Rescue] Filter selected: {filter_type}")
+    def filter_rescue(df, filter_type, match="any"):
+        """
+        Return the full rescue-filtered frame for the selected category.
 
+        filter_type may also be a list of categories, combined with match="any" (OR)
+        or match="all" (AND).
+        """
         # Normalize blank/None
         if not filter_type:
             filter_type = "ALL"
 
-        dff = df.copy()
+        dff = df
+        requested = [filter_type] if isinstance(filter_type, str) else list(filter_type)
+        categories = [c for c in requested if c in RESCUE_CATEGORIES]
         breed_col = get_breed_column(dff)
 
-        if not breed_col or filter_type == "ALL":
+        if not breed_col or "ALL" in requested or not categories:
             logger.info(f"[Rescue] Returning ALL rows. breed_col={breed_col}, rows={len(dff)}")
-            return dff.to_dict("records"), []
+            return dff
 
-        # Detect age column
-        age_col = get_age_column(dff)
-        if age_col:
-            dff[age_col] = pd.to_numeric(dff[age_col], errors="coerce")
-
-        # Rescue definitions
-        if filter_type == "water":
-            breeds = ["Labrador", "Retriever", "Newfoundland"]
-            age_limit = 2
-        elif filter_type == "mountain":
-            breeds = ["German Shepherd", "Malamute", "Sheepdog"]
-            age_limit = 3
-        elif filter_type == "disaster":
-            breeds = ["Doberman", "German Shepherd", "Bloodhound"]
-            age_limit = 3
-        else:
-            return dff.to_dict("records"), []
+        # Fast path: one vectorized lookup on the bitmask precomputed by the ETL
+        if RESCUE_MASK_COLUMN in dff.columns:
+            rescue_df = dff[category_mask(dff[RESCUE_MASK_COLUMN], categories, match)]
+            logger.info(f"[Rescue] Rows after bitmask filter {categories}: {len(rescue_df)}")
+            return rescue_df
 
+        # Datasets without the bitmask: build it here (one breed scan per request)
+        age_col = get_age_column(dff)
         logger.info(f"[Rescue] Rows before filter: {len(dff)} (breed_col={breed_col}, age_col={age_col})")
 
-        # Partial match filter
-        pattern = "|".join(b.lower() for b in breeds)
+        bitmask = rescue_bitmask(dff[breed_col], dff[age_col] if age_col else None)
+        rescue_df = dff[category_mask(bitmask, categories, match)]
 
-        rescue_df = dff[
-            dff[breed_col]
-            .astype(str)
-            .str.lower()
-            .str.contains(pattern, na=False)
-        ]
+        logger.info(f"[Rescue] Rows after filter: {len(rescue_df)}")
 
-        # Apply age filter
-        if age_col:
-            rescue_df = rescue_df[rescue_df[age_col] <= age_limit]
+        return rescue_df
 
-        logger.info(f"[Rescue] Rows after filter: {len(rescue_df)}")
+    def rescue_rows(df, version, filter_type, filter_query=None, sort_by=None):
+        """Cached row positions for a rescue category + table filter/sort."""
+        category = tuple(filter_type) if isinstance(filter_type, list) else (filter_type or "ALL")
+        key = (version, "rescue", category, filter_query or "", sort_key(sort_by))
+        return cache.get_or_compute(
+            key, lambda: select_rows(filter_rescue(df, filter_type), filter_query, sort_by)
+        )
+
+    @app.callback(
+        [Output("datatable-rescue", "data"),
+         Output("datatable-rescue", "page_count"),
+         Output("datatable-rescue", "page_current"),
+         Output("rescue-row-count", "children"),
+         Output("datatable-rescue", "selected_rows")],
+        [Input("filter-type-rescue", "value"),
+         Input("datatable-rescue", "page_current"),
+         Input("datatable-rescue", "page_size"),
+         Input("datatable-rescue", "sort_by"),
+         Input("datatable-rescue", "filter_query"),
+         Input("dataset-version", "data")],
+    )
+    def update_rescue_table(filter_type, page_current, page_size, sort_by, filter_query, _shown_version):
+        logger.info(f"[Rescue] Filter selected: {filter_type}")
+        df, version = dataset.current()
+
+        # A new category, filter or sort starts back on the first page
+        triggered = {t["prop_id"] for t in ctx.triggered}
+        if triggered & {"filter-type-rescue.value", "datatable-rescue.filter_query", "datatable-rescue.sort_by"}:
+            page_current = 0
 
-        return rescue_df.to_dict("records"), []
+        rows = rescue_rows(df, version, filter_type, filter_query, sort_by)
+
+        records, page_count, page_current, total = paginate(
+            df, page_current, page_size, rows=rows, columns=record_columns(df)
+        )
+        logger.info(f"[Rescue] Page {page_current + 1}/{page_count} of {total} rows")
+
+        return records, page_count, page_current, f"{total} matching rows", []
 
     # =============================================================
     # RESCUE PIE CHART
     # =============================================================
     @app.callback(
         Output("graph-rescue", "children"),
-        Input("datatable-rescue", "derived_virtual_data"),
+        [Input("filter-type-rescue", "value"),
+         Input("datatable-rescue", "filter_query"),
+         Input("dataset-version", "data")],
     )
-    def update_rescue_pie(table_data):
-        if not table_data:
-            return [html.P("No data available")]
-
-        dff = pd.DataFrame(table_data)
-        breed_col = get_breed_column(dff)
+    def update_rescue_pie(filter_type, filter_query, _shown_version):
+        df, version = dataset.current()
+        breed_col = get_breed_column(df)
 
         if not breed_col:
             return [html.P("Breed data unavailable")]
 
-        fig = px.pie(dff, names=breed_col, title="Rescue-Ready Dogs by Breed")
+        category = tuple(filter_type) if isinstance(filter_type, list) else (filter_type or "ALL")
+
+        if not filter_query and isinstance(category, str) and pushdown(version, "rescue_breed"):
+            # Counts computed inside MongoDB; nothing but the counts comes back
+            key = (version, "rescue-pie-mongo", category)
+            counts = cache.get_or_compute(key, lambda: mongo_breed_counts(category, breed_col))
+        else:
+            # Chart covers every matching row, not just the visible page
+            rows = rescue_rows(df, version, filter_type, filter_query)
+            key = (version, "rescue-pie", category, filter_query or "")
+            counts = cache.get_or_compute(
+                key,
+                lambda: df[breed_col].iloc[rows].value_counts().loc[lambda c: c > 0]
+                .rename_axis(breed_col).reset_index(name="count"),
+            )
+
+        if counts.empty:
+            return [html.P("No data available")]
+
+        fig = px.pie(counts, names=breed_col, values="count", title="Rescue-Ready Dogs by Breed")
         fig.update_layout(height=400)
 
         return [
@@ -182,40 +311,101 @@ def register_callbacks(app, df, logger):
     # =============================================================
     # TAB 2 – ADOPTION & FOSTER
     # =============================================================
-    @app.callback(
-        [Output("datatable-adopt", "data"),
-         Output("graph-adopt", "children")],
-        Input("outcome-filter-adopt", "value"),
-    )
-    def update_adopt_view(outcome_filter):
+    def filter_adopt(df, outcome_filter):
+        """Return the full frame filtered to the selected outcome type."""
         # Normalize blank/None to "all"
         if not outcome_filter:
             outcome_filter = "all"
 
         logger.info(f"[Adopt] Outcome filter selected: '{outcome_filter}'")
 
-        dff = df.copy()
+        dff = df
         outcome_col = get_outcome_type_column(dff)
-        breed_col = get_breed_column(dff)
 
-        logger.info(f"[Adopt] outcome_col={outcome_col}, breed_col={breed_col}, rows before={len(dff)}")
+        logger.info(f"[Adopt] outcome_col={outcome_col}, rows before={len(dff)}")
 
         if outcome_col and outcome_filter != "all":
-            dff = dff[
-                dff[outcome_col].astype(str).str.strip()
-                == str(outcome_filter).strip()
-            ]
+            column = dff[outcome_col]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                # Compare against the few categories, then select by code
+                matches = [c for c in column.cat.categories if str(c).strip() == str(outcome_filter).strip()]
+                dff = dff[column.isin(matches)]
+            else:
+                dff = dff[
+                    column.astype(str).str.strip()
+                    == str(outcome_filter).strip()
+                ]
 
         logger.info(f"[Adopt] rows after filter={len(dff)}")
+        return dff
 
-        if not outcome_col or not breed_col:
-            return dff.to_dict("records"), [html.P("Outcome or breed data unavailable.")]
+    def adopt_rows(df, version, outcome_filter, filter_query=None, sort_by=None):
+        """Cached row positions for an outcome type + table filter/sort."""
+        key = (version, "adopt", outcome_filter or "all", filter_query or "", sort_key(sort_by))
+        return cache.get_or_compute(
+            key, lambda: select_rows(filter_adopt(df, outcome_filter), filter_query, sort_by)
+        )
 
-        counts = (
-            dff.groupby([outcome_col, breed_col])
-            .size()
-            .reset_index(name="count")
+    @app.callback(
+        [Output("datatable-adopt", "data"),
+         Output("datatable-adopt", "page_count"),
+         Output("datatable-adopt", "page_current"),
+         Output("adopt-row-count", "children")],
+        [Input("outcome-filter-adopt", "value"),
+         Input("datatable-adopt", "page_current"),
+         Input("datatable-adopt", "page_size"),
+         Input("datatable-adopt", "sort_by"),
+         Input("datatable-adopt", "filter_query"),
+         Input("dataset-version", "data")],
+    )
+    def update_adopt_table(outcome_filter, page_current, page_size, sort_by, filter_query, _shown_version):
+        df, version = dataset.current()
+
+        # A new outcome, filter or sort starts back on the first page
+        triggered = {t["prop_id"] for t in ctx.triggered}
+        if triggered & {"outcome-filter-adopt.value", "datatable-adopt.filter_query", "datatable-adopt.sort_by"}:
+            page_current = 0
+
+        rows = adopt_rows(df, version, outcome_filter, filter_query, sort_by)
+
+        records, page_count, page_current, total = paginate(
+            df, page_current, page_size, rows=rows, columns=record_columns(df)
         )
+        logger.info(f"[Adopt] Page {page_current + 1}/{page_count} of {total} rows")
+
+        return records, page_count, page_current, f"{total} matching rows"
+
+    @app.callback(
+        Output("graph-adopt", "children"),
+        [Input("outcome-filter-adopt", "value"),
+         Input("datatable-adopt", "filter_query"),
+         Input("dataset-version", "data")],
+    )
+    def update_adopt_view(outcome_filter, filter_query, _shown_version):
+        df, version = dataset.current()
+        outcome_col = get_outcome_type_column(df)
+        breed_col = get_breed_column(df)
+
+        if not outcome_col or not breed_col:
+            return [html.P("Outcome or breed data unavailable.")]
+
+        def outcome_counts():
+            dff = df.iloc[adopt_rows(df, version, outcome_filter, filter_query)]
+            return (
+                dff.groupby([outcome_col, breed_col], observed=True)
+                .size()
+                .reset_index(name="count")
+            )
+
+        if not filter_query and pushdown(version, "breed_outcome_year"):
+            # Counts computed inside MongoDB; nothing but the counts comes back
+            key = (version, "adopt-bar-mongo", outcome_filter or "all")
+            counts = cache.get_or_compute(
+                key, lambda: mongo_outcome_counts(outcome_filter, outcome_col, breed_col)
+            )
+        else:
+            key = (version, "adopt-bar", outcome_filter or "all", filter_query or "")
+            counts = cache.get_or_compute(key, outcome_counts)
 
         fig = px.bar(
             counts,
@@ -226,4 +416,24 @@ def register_callbacks(app, df, logger):
         )
         fig.update_layout(height=450)
 
-        return dff.to_dict("records"), [dcc.Graph(figure=fig, style={"height": "100%"})]
\ No newline at end of file
+        return [dcc.Graph(figure=fig, style={"height": "100%"})]
+
+    # =============================================================
+    # HOT RELOAD: pick up a swapped-in dataset
+    # =============================================================
+    @app.callback(
+        [Output("dataset-version", "data"),
+         Output("outcome-filter-adopt", "options"),
+         Output("datatable-rescue", "columns"),
+         Output("datatable-adopt", "columns")],
+        Input("dataset-poll", "n_intervals"),
+        State("dataset-version", "data"),
+    )
+    def poll_dataset(_n_intervals, shown_version):
+        df, version = dataset.current()
+        if version == shown_version:
+            raise PreventUpdate
+
+        logger.info(f"[Refresh] Page moves from dataset {shown_version} to {version}")
+        # The new version re-triggers the table + chart callbacks
+        return version, outcome_options(df), table_columns(df), table_columns(df)
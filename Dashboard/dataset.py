@@ -0,0 +1,206 @@
+# dataset.py – live (hot-reloadable) dashboard dataset + background refresher
+import os
+import threading
+import time
+
+from etl.watcher import base_version
+
+
+class LiveDataset:
+    """
+    Holds the dashboard frame and its version as ONE (frame, version) tuple.
+
+    Callbacks call current() once per request and work on that pair only, so a
+    swap in the middle of a request is never seen half-way. swap() receives a
+    fully built frame; replacing the tuple is a single reference assignment.
+    """
+
+    def __init__(self, df, version="static"):
+        self._current = (self._prepare(df), version)
+        self._swap_lock = threading.Lock()
+        self._listeners = []
+
+    @staticmethod
+    def _prepare(df):
+        # Positional index: cached filter results are arrays of row positions
+        if "_id" in df.columns:
+            df = df.drop(columns=["_id"])
+        return df.reset_index(drop=True)
+
+    def current(self):
+        """Return (frame, version) of the dataset being served."""
+        return self._current
+
+    @property
+    def version(self):
+        return self._current[1]
+
+    def subscribe(self, listener):
+        """Call listener(version) after every swap (e.g. to drop stale cache entries)."""
+        self._listeners.append(listener)
+
+    def swap(self, df, version):
+        """Atomically replace the served dataset; a no-op if version is unchanged."""
+        with self._swap_lock:
+            if version == self._current[1]:
+                return False
+            self._current = (self._prepare(df), version)
+
+        for listener in self._listeners:
+            listener(version)
+        return True
+
+
+class DatasetRefresher:
+    """
+    Background thread that keeps a LiveDataset current.
+
+    Every `interval` seconds (or right away after trigger(), e.g. from a change
+    stream) it compares the source fingerprint with the served snapshot:
+    - a newer snapshot already on disk (written by a background rebuild or another
+      worker) is loaded and swapped in
+    - otherwise, if the source changed, run_incremental() builds the new frame off
+      the request path and it is swapped in
+    - every `full_interval` seconds (0 disables) a full rebuild() runs instead, since
+      incremental runs do not see in-place updates of existing documents
+    With a SharedDataset the new frame is published once and every worker attaches.
+
+    A refresh holds the ETLManager lock from reading the served frame to swapping
+    the new one, like the ChangeWatcher. While the served version carries watcher
+    batches ("<snapshot>+liveN") no snapshot is reloaded over them: the incremental
+    run continues from the watermarks of <snapshot> on the served frame instead.
+    """
+
+    def __init__(self, etl_manager, dataset, logger, interval=300, shared=None, watch=False,
+                 full_interval=0):
+        self.etl_manager = etl_manager
+        self.dataset = dataset
+        self.logger = logger
+        self.interval = interval
+        self.shared = shared
+        self.watch = watch
+        self.full_interval = full_interval
+        self.last_full = time.monotonic()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    # -------------------------------
+    # Lifecycle
+    # -------------------------------
+    def start(self):
+        thread = threading.Thread(target=self._run, name="dataset-refresher", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+        if self.watch:
+            for collection in ("intakes", "outcomes"):
+                watcher = threading.Thread(
+                    target=self._watch, args=(collection,), name=f"dataset-watch-{collection}", daemon=True
+                )
+                watcher.start()
+                self._threads.append(watcher)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def trigger(self):
+        """Refresh as soon as possible instead of waiting for the interval."""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.refresh()
+            except Exception as e:
+                self.logger.error(f"[Refresh] Dataset refresh failed: {e}")
+
+    def _watch(self, collection):
+        """Wake the refresher on any insert/update/delete (needs a replica set, e.g. Atlas)."""
+        try:
+            with self.etl_manager.db.database[collection].watch() as stream:
+                for _ in stream:
+                    if self._stop.is_set():
+                        return
+                    self.trigger()
+        except Exception as e:
+            self.logger.warning(f"[Refresh] Change stream on '{collection}' unavailable, polling only: {e}")
+
+    # -------------------------------
+    # Refresh
+    # -------------------------------
+    def refresh(self):
+        """Bring the dataset up to date now; returns True if a new version was swapped in."""
+        with self.etl_manager.lock:
+            if self.shared is None:
+                return self._refresh_local()
+
+            with self.shared.loader_lock():
+                meta = self.shared.metadata()
+                if meta is None or meta["version"] == self.dataset.version:
+                    # This worker leads: rebuild if needed and publish for the others
+                    df, version = self._build()
+                    if df is None:
+                        return False
+                    self.shared.publish(df, version)
+
+            df, meta = self.shared.attach()
+            return self._swap(df, meta["version"])
+
+    def _refresh_local(self):
+        df, version = self._build()
+        return False if df is None else self._swap(df, version)
+
+    def _build(self):
+        """Return (frame, version) newer than the served one, or (None, None)."""
+        manager = self.etl_manager
+        if manager.rebuild_thread is not None and manager.rebuild_thread.is_alive():
+            # Startup snapshot check/rebuild still running; picked up next round
+            return None, None
+
+        if self.full_interval and time.monotonic() - self.last_full >= self.full_interval:
+            self.logger.info("[Refresh] Full rebuild due, picking up in-place updates.")
+            self.last_full = time.monotonic()
+            df = manager.rebuild()
+            return df, manager.dataset_version or self.dataset.version
+
+        current_df, served = self.dataset.current()
+        base = base_version(served)
+        if base != served:
+            # Watcher batches on top of `base`: re-derive everything changed since base
+            # on the served frame (the watcher's animals again, which is harmless)
+            base_meta = manager.state_store.snapshot_metadata(base)
+            if base_meta is None:
+                self.logger.info(f"[Refresh] Snapshot {base} is gone, rebuilding live dataset in full.")
+                df = manager.rebuild()
+            else:
+                df = manager.run_incremental(previous_df=current_df, watermarks=base_meta.get("watermarks", {}))
+            return df, manager.dataset_version or served
+
+        meta = manager.state_store.latest_metadata(manager.transform_version)
+        if meta is not None:
+            version = os.path.splitext(meta["data_file"])[0]
+            if version != served:
+                df, meta = manager.state_store.load_latest(manager.transform_version)
+                if df is not None:
+                    return df, os.path.splitext(meta["data_file"])[0]
+
+        current, _ = manager.source_state()
+        if meta is not None and current == meta.get("fingerprint"):
+            return None, None
+
+        self.logger.info("[Refresh] Source changed, rebuilding dataset incrementally.")
+        df = manager.run_incremental(previous_df=current_df)
+        return df, manager.dataset_version or served
+
+    def _swap(self, df, version):
+        swapped = self.dataset.swap(df, version)
+        if swapped:
+            self.logger.info(f"[Refresh] Now serving dataset {version} ({len(df)} rows).")
+        return swapped
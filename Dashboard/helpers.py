@@ -1,7 +1,15 @@
 # helpers.py – shared helper functions for the dashboard
+import math
+
+import pandas as pd
+
+from etl.columns import table_column_names
 
 DEFAULT_LOCATION = [30.2672, -97.7431]  # Austin, Texas
 
+# Row fields the map callback reads from the table data (sent even when not shown)
+MAP_COLUMNS = ["location_lat", "location_long", "breed_outcome", "breed_intake", "breed", "name_intake", "name"]
+
 def get_breed_column(dframe):
     """Return the best breed column available in the dataframe."""
     if "breed_outcome" in dframe.columns:
@@ -36,9 +44,158 @@ def group_small_slices(df, column, threshold=0.05):
     df[column] = df[column].apply(lambda x: "Other" if x in small_slices else x)
     return df
 
+def visible_columns(dframe):
+    """Table columns to show: the configured ones the dataset has, else every column."""
+    configured = table_column_names()
+    if configured is None:
+        return list(dframe.columns)
+    return [c for c in configured if c in dframe.columns] or list(dframe.columns)
+
+
+def record_columns(dframe):
+    """Columns sent per table row: the visible ones plus what the map needs."""
+    return list(dict.fromkeys(visible_columns(dframe) + [c for c in MAP_COLUMNS if c in dframe.columns]))
+
 def get_age_column(df):
     if "age_in_years" in df.columns:
         return "age_in_years"
     if "age_upon_outcome_in_weeks" in df.columns:
         return "age_upon_outcome_in_weeks"
-    return None
\ No newline at end of file
+    return None
+
+# -------------------------------------------------------------
+# SERVER-SIDE TABLE PAGING / SORTING / FILTERING
+# -------------------------------------------------------------
+
+# DataTable filter operators, longest tokens first so "ge " is not read as "eq "
+FILTER_OPERATORS = [
+    ["ge ", ">="],
+    ["le ", "<="],
+    ["lt ", "<"],
+    ["gt ", ">"],
+    ["ne ", "!="],
+    ["eq ", "="],
+    ["contains "],
+    ["datestartswith "],
+]
+
+
+def split_filter_part(filter_part):
+    """Split one DataTable filter expression into (column, operator, value)."""
+    for operator_type in FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find("{") + 1: name_part.rfind("}")]
+
+                value_part = value_part.strip()
+                if not value_part:
+                    return name, operator_type[0].strip(), None
+
+                v0 = value_part[0]
+                if v0 == value_part[-1] and v0 in ("'", '"', "`"):
+                    value = value_part[1:-1].replace("\\" + v0, v0)
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+
+                return name, operator_type[0].strip(), value
+
+    return None, None, None
+
+
+def apply_table_filter(dframe, filter_query):
+    """Apply a DataTable filter_query string to the dataframe on the server."""
+    if not filter_query:
+        return dframe
+
+    for filter_part in filter_query.split(" && "):
+        col_name, operator, filter_value = split_filter_part(filter_part)
+
+        if col_name not in dframe.columns or filter_value is None:
+            continue
+
+        column = dframe[col_name]
+
+        if operator in ("eq", "ne", "lt", "le", "gt", "ge"):
+            # Compare numerically when the filter value is a number
+            if isinstance(filter_value, float):
+                column = pd.to_numeric(column, errors="coerce")
+            else:
+                column = column.astype(str)
+
+            if operator == "eq":
+                mask = column == filter_value
+            elif operator == "ne":
+                mask = column != filter_value
+            elif operator == "lt":
+                mask = column < filter_value
+            elif operator == "le":
+                mask = column <= filter_value
+            elif operator == "gt":
+                mask = column > filter_value
+            else:
+                mask = column >= filter_value
+
+        elif operator == "contains":
+            mask = column.astype(str).str.contains(str(filter_value), case=False, regex=False, na=False)
+
+        else:  # datestartswith
+            mask = column.astype(str).str.startswith(str(filter_value), na=False)
+
+        dframe = dframe.loc[mask]
+
+    return dframe
+
+
+def apply_table_sort(dframe, sort_by):
+    """Sort the dataframe by the DataTable sort_by specification."""
+    if not sort_by:
+        return dframe
+
+    sort_cols = [s["column_id"] for s in sort_by if s["column_id"] in dframe.columns]
+    if not sort_cols:
+        return dframe
+
+    ascending = [s["direction"] == "asc" for s in sort_by if s["column_id"] in dframe.columns]
+    return dframe.sort_values(sort_cols, ascending=ascending, kind="mergesort")
+
+
+def sort_key(sort_by):
+    """Hashable form of a DataTable sort_by list (for cache keys)."""
+    return tuple((s["column_id"], s["direction"]) for s in sort_by or [])
+
+
+def paginate(dframe, page_current, page_size, rows=None, columns=None):
+    """
+    Slice a single page out of the dataframe.
+
+    If rows (an array of row positions into dframe) is given, the page is taken
+    from those positions instead of the whole frame. columns limits the fields
+    sent per row.
+
+    Returns (page records, page_count, clamped page_current, total rows) so the
+    callback only ships the visible rows to the browser.
+    """
+    total = len(dframe) if rows is None else len(rows)
+    page_size = page_size or 10
+    page_count = max(1, math.ceil(total / page_size))
+
+    page_current = page_current or 0
+    if page_current >= page_count:
+        page_current = page_count - 1
+
+    start = page_current * page_size
+    if rows is None:
+        page = dframe.iloc[start:start + page_size]
+    else:
+        page = dframe.iloc[rows[start:start + page_size]]
+    if columns is not None:
+        page = page[columns]
+
+    # Nullable/categorical columns: send missing values to the browser as null
+    page = page.astype(object).where(page.notna(), None)
+
+    return page.to_dict("records"), page_count, page_current, total
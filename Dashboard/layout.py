@@ -5,10 +5,43 @@ import base64
 import os
 import pandas as pd
 
-from helpers import get_outcome_type_column
+from helpers import get_outcome_type_column, visible_columns
 
 
-def create_layout(df):
+# Rows per DataTable page (only this many rows are sent to the browser)
+PAGE_SIZE = 10
+
+# How often the browser checks for a hot-reloaded dataset (milliseconds)
+DATASET_POLL_MS = 30_000
+
+
+def outcome_options(df):
+    """Outcome type options for the adoption tab dropdown."""
+    outcome_col = get_outcome_type_column(df)
+    if not outcome_col:
+        return []
+
+    outcome_values = sorted(
+        df[outcome_col]
+        .astype(str)
+        .str.strip()
+        .replace("", pd.NA)
+        .dropna()
+        .unique()
+    )
+
+    return (
+        [{"label": "All", "value": "all"}] +
+        [{"label": str(v), "value": str(v)} for v in outcome_values]
+    )
+
+
+def table_columns(df):
+    """DataTable column definitions for the visible columns (DASHBOARD_TABLE_COLUMNS)."""
+    return [{"name": c, "id": c} for c in visible_columns(df)]
+
+
+def create_layout(df, dataset_version="static"):
     """Build and return the full Dash layout."""
 
     # Load the Grazioso Salvare logo (relative to this file)
@@ -16,25 +49,6 @@ def create_layout(df):
     with open(logo_path, "rb") as img_file:
         encoded_image = base64.b64encode(img_file.read()).decode()
 
-    # Outcome type options for the adoption tab dropdown
-    outcome_col = get_outcome_type_column(df)
-    if outcome_col:
-        outcome_values = sorted(
-            df[outcome_col]
-            .astype(str)
-            .str.strip()
-            .replace("", pd.NA)
-            .dropna()
-            .unique()
-        )
-
-        outcome_options = (
-            [{"label": "All", "value": "all"}] +
-            [{"label": str(v), "value": str(v)} for v in outcome_values]
-        )
-    else:
-        outcome_options = []
-
     return html.Div([
         # Title + logo
         html.Center(html.B(html.H1("Grazioso Salvare – Rescue & Adoption Dashboard"))),
@@ -49,6 +63,11 @@ def create_layout(df):
 
         html.Hr(),
 
+        # Version of the dataset this page shows; the poll swaps in dropdown
+        # options/columns and re-runs the table callbacks after a hot reload
+        dcc.Store(id="dataset-version", data=dataset_version),
+        dcc.Interval(id="dataset-poll", interval=DATASET_POLL_MS),
+
         dcc.Tabs(id="tabs", value="tab-rescue", children=[
 
             # ------------------------------------------------
@@ -76,16 +95,26 @@ def create_layout(df):
                 ], style={"width": "20%", "float": "left"}),
 
                 html.Div([
+                    # Paging, sorting and filtering run on the server;
+                    # callbacks ship only the visible page.
                     dash_table.DataTable(
                         id="datatable-rescue",
-                        columns=[{"name": c, "id": c} for c in df.columns],
-                        data=df.to_dict("records"),
+                        columns=table_columns(df),
+                        data=[],
                         row_selectable="single",
                         selected_rows=[],
                         style_table={"overflowX": "auto"},
                         style_cell={"textAlign": "left", "fontSize": 12},
-                        page_size=10,
-                    )
+                        page_current=0,
+                        page_size=PAGE_SIZE,
+                        page_action="custom",
+                        sort_action="custom",
+                        sort_mode="multi",
+                        sort_by=[],
+                        filter_action="custom",
+                        filter_query="",
+                    ),
+                    html.Div(id="rescue-row-count", style={"fontSize": 12}),
                 ], style={"width": "78%", "float": "right"}),
 
                 html.Div(style={"clear": "both"}),
@@ -112,7 +141,7 @@ def create_layout(df):
                     html.Label("Outcome Type (Adoption / Foster / Transfer / etc.):"),
                     dcc.Dropdown(
                         id="outcome-filter-adopt",
-                        options=outcome_options,
+                        options=outcome_options(df),
                         value="all",
                         clearable=False,
                         style={"width": "300px"}
@@ -123,14 +152,22 @@ def create_layout(df):
 
                 dash_table.DataTable(
                     id="datatable-adopt",
-                    columns=[{"name": c, "id": c} for c in df.columns],
-                    data=df.to_dict("records"),
+                    columns=table_columns(df),
+                    data=[],
                     row_selectable="single",
                     selected_rows=[],
                     style_table={"overflowX": "auto"},
                     style_cell={"textAlign": "left", "fontSize": 12},
-                    page_size=10,
+                    page_current=0,
+                    page_size=PAGE_SIZE,
+                    page_action="custom",
+                    sort_action="custom",
+                    sort_mode="multi",
+                    sort_by=[],
+                    filter_action="custom",
+                    filter_query="",
                 ),
+                html.Div(id="adopt-row-count", style={"fontSize": 12}),
 
                 html.Br(), html.Hr(),
 
@@ -1,10 +1,303 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 
+try:
+    import pyarrow  # noqa: F401  (optional: Arrow-backed string columns)
+    STRING_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    STRING_DTYPE = pd.StringDtype()
+
+
+# ---------------------------------------------------------
+# Declared column schemas for the columnar extraction path
+# (standardized column name -> "string" | "datetime" | "float")
+# ---------------------------------------------------------
+INTAKE_SCHEMA = {
+    "animal_id": "string",
+    "datetime_intake": "datetime",
+    "name": "string",
+    "animal_type": "string",
+    "breed": "string",
+    "color": "string",
+    "intake_type": "string",
+    "intake_condition": "string",
+    "sex_upon_intake": "string",
+    "age_upon_intake": "string",
+    "found_location": "string",
+}
+
+OUTCOME_SCHEMA = {
+    "animal_id": "string",
+    "datetime_outcome": "datetime",
+    "date_of_birth": "datetime",
+    "name": "string",
+    "animal_type": "string",
+    "breed": "string",
+    "color": "string",
+    "outcome_type": "string",
+    "outcome_subtype": "string",
+    "sex_upon_outcome": "string",
+    "age_upon_outcome": "string",
+    "age_upon_outcome_in_weeks": "float",
+    "location_lat": "float",
+    "location_long": "float",
+}
+
+# collection -> (schema, label) used to decode its documents
+COLLECTION_SCHEMAS = {
+    "intakes": (INTAKE_SCHEMA, "intake"),
+    "outcomes": (OUTCOME_SCHEMA, "outcome"),
+}
+
+# Raw field names that may hold the animal id in the source collections
+ANIMAL_ID_FIELDS = ("animal_id", "Animal ID")
+
+
+def empty_frame(schema):
+    """Zero-row frame with the schema's columns and dtypes (merges like a real, empty result)."""
+    dtypes = {"datetime": "datetime64[ns]", "float": "float64", "string": "object"}
+    return pd.DataFrame({
+        name: pd.Series([], dtype=dtypes.get(kind, "object")) for name, kind in schema.items()
+    })
+
+
+def standardize_column(col):
+    """Standardize a raw MongoDB field name (e.g. 'Animal ID' -> 'animal_id')."""
+    return col.strip().lower().replace(" ", "_")
+
 
 class DataLoader:
-    def __init__(self, db, logger):
+    def __init__(self, db, logger, batch_size=5000, columnar=False, partitions=1, partition_field="_id",
+                 projections=None):
         self.db = db
         self.logger = logger
+        self.batch_size = batch_size
+        # columnar=True decodes documents straight into typed columns (see _load_columnar)
+        self.columnar = columnar
+        # partitions > 1 reads each collection as that many ranges of partition_field
+        # (a field name, or {collection: field} when the date field differs) in parallel
+        self.partitions = partitions
+        self.partition_field = partition_field
+        # {collection: MongoDB projection} limiting the fields read (see etl/columns.py);
+        # collections without an entry load every field
+        self.projections = projections or {}
+
+    # ------------------------------------
+    # Query helpers
+    # ------------------------------------
+    @staticmethod
+    def animal_query(animal_ids):
+        """Build a query matching any of the given animal ids under either raw field name."""
+        animal_ids = list(animal_ids)
+        return {"$or": [{field: {"$in": animal_ids}} for field in ANIMAL_ID_FIELDS]}
+
+    # ------------------------------------
+    # Partitioned (parallel) reads
+    # ------------------------------------
+    def _partitioned(self, read, query, collection):
+        """
+        Call read(query) once per range partition of the collection, in parallel threads.
+
+        With partitions <= 1 this is a single plain call. Otherwise the query is ANDed
+        with each range from AnimalShelter.partition_bounds and the per-partition
+        results are returned in range order.
+        """
+        if self.partitions <= 1:
+            return [read(query)]
+
+        field = self._partition_field(collection)
+
+        ranges = self.db.partition_bounds(collection, self.partitions, query, field=field)
+        queries = [
+            {"$and": [query, bound]} if query and bound else (query or bound)
+            for bound in ranges
+        ]
+        self.logger.info(f"DataLoader: Reading {collection} as {len(queries)} parallel partitions.")
+
+        with ThreadPoolExecutor(max_workers=len(queries), thread_name_prefix=f"load-{collection}") as pool:
+            return list(pool.map(read, queries))
+
+    def _partition_field(self, collection):
+        field = self.partition_field
+        if isinstance(field, dict):
+            field = field.get(collection, "_id")
+        return field
+
+    def _keeps_id(self, collection):
+        """Date-range partitions return rows out of _id order, so _id is kept to restore it."""
+        return self.partitions > 1 and self._partition_field(collection) != "_id"
+
+    @staticmethod
+    def _restore_id_order(df):
+        """Put partitioned rows back in _id (insertion) order, as an unpartitioned read returns them."""
+        if "_id" not in df.columns:
+            return df
+        return df.sort_values("_id", kind="stable", ignore_index=True).drop(columns=["_id"])
+
+    # ------------------------------------
+    # Streamed read helper
+    # ------------------------------------
+    def _read_chunks(self, query, collection, projection=None, keep_id=False):
+        """Stream one query in fixed-size chunks, returning one DataFrame per chunk."""
+        frames = []
+        for chunk in self.db.stream(
+            query if query else {},
+            collection=collection,
+            projection=projection,
+            batch_size=self.batch_size,
+            chunk_size=self.batch_size,
+        ):
+            frame = pd.DataFrame(chunk)
+            if "_id" in frame.columns and not keep_id:
+                frame.drop(columns=["_id"], inplace=True)
+            frames.append(frame)
+        return frames
+
+    def _read_frame(self, query, collection, projection=None):
+        """
+        Stream documents from MongoDB in fixed-size chunks and build the
+        DataFrame incrementally, so only one chunk of raw dicts is held at a time.
+        """
+        keep_id = self._keeps_id(collection)
+        frames = [
+            frame
+            for part in self._partitioned(
+                lambda q: self._read_chunks(q, collection, projection, keep_id), query, collection
+            )
+            for frame in part
+        ]
+
+        if not frames:
+            return pd.DataFrame()
+        if len(frames) == 1:
+            return frames[0]
+        df = pd.concat(frames, ignore_index=True)
+        return self._restore_id_order(df) if keep_id else df
+
+    # ------------------------------------
+    # Columnar extraction (single pass)
+    # ------------------------------------
+    def _load_columnar(self, query, collection, schema, label):
+        """
+        Decode each streamed chunk straight into typed columns and build the
+        cleaned, animal_id-indexed DataFrame in one pass.
+
+        Every chunk is renamed, filtered for missing animal_id and cast to the declared
+        schema while it is still small, so the untyped Python objects of a chunk are
+        freed before the next one arrives and the full frame is assembled only once.
+        Strings use Arrow-backed storage when pyarrow is installed.
+        """
+        self.logger.info(f"DataLoader: Loading {label} records from MongoDB (columnar).")
+
+        keep_id = self._keeps_id(collection)
+        parts = self._partitioned(
+            lambda q: self._columnar_chunks(q, collection, schema, keep_id), query, collection
+        )
+        frames = [frame for part_frames, _ in parts for frame in part_frames]
+        dropped = sum(part_dropped for _, part_dropped in parts)
+        return self._assemble_columnar(frames, dropped, label, keep_id)
+
+    def _assemble_columnar(self, frames, dropped, label, keep_id=False):
+        """Concatenate decoded chunk frames into the animal_id-indexed result."""
+        self.logger.info(f"DataLoader: Dropped {dropped} {label} rows missing animal_id.")
+
+        if not frames:
+            self.logger.info(f"DataLoader: Loaded 0 cleaned {label} records.")
+            return pd.DataFrame()
+
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        if keep_id:
+            df = self._restore_id_order(df)
+        df.index = pd.Index(df["animal_id"], name="animal_id")
+
+        self.logger.info(f"DataLoader: Loaded {len(df)} cleaned {label} records.")
+        return df
+
+    def _columnar_chunks(self, query, collection, schema, keep_id=False):
+        """Stream one query and return (typed chunk frames, rows dropped for missing animal_id)."""
+        names = {}  # raw field name -> standardized name
+        frames = []
+        dropped = 0
+
+        for chunk in self.db.stream(
+            query if query else {},
+            collection=collection,
+            projection=self.projections.get(collection),
+            batch_size=self.batch_size,
+            chunk_size=self.batch_size,
+        ):
+            frame, chunk_dropped = self._decode_chunk(chunk, schema, names, keep_id)
+            dropped += chunk_dropped
+            if frame is not None:
+                frames.append(frame)
+
+        return frames, dropped
+
+    def iter_chunks(self, collection, query=None):
+        """
+        Stream one collection as typed, cleaned chunk frames (at most batch_size rows each)
+        without assembling them; for callers that cannot hold the whole collection.
+        """
+        schema, label = COLLECTION_SCHEMAS[collection]
+        names = {}  # raw field name -> standardized name
+        dropped = 0
+
+        for chunk in self.db.stream(
+            query if query else {},
+            collection=collection,
+            projection=self.projections.get(collection),
+            batch_size=self.batch_size,
+            chunk_size=self.batch_size,
+        ):
+            frame, chunk_dropped = self._decode_chunk(chunk, schema, names)
+            dropped += chunk_dropped
+            if frame is not None and len(frame):
+                yield frame
+
+        self.logger.info(f"DataLoader: Dropped {dropped} {label} rows missing animal_id.")
+
+    def _decode_chunk(self, chunk, schema, names, keep_id=False):
+        """Turn one chunk of raw documents into (typed frame or None, rows dropped)."""
+        frame = pd.DataFrame(chunk)
+        frame.columns = [
+            names.get(col) or names.setdefault(col, standardize_column(col))
+            for col in frame.columns
+        ]
+        if "_id" in frame.columns and not keep_id:
+            frame.drop(columns=["_id"], inplace=True)
+
+        if "animal_id" not in frame.columns:
+            return None, len(frame)
+
+        dropped = 0
+        present = frame["animal_id"].notna()
+        if not present.all():
+            dropped = int((~present).sum())
+            frame = frame.loc[present]
+
+        return self._apply_schema(frame, schema), dropped
+
+    @staticmethod
+    def _apply_schema(frame, schema):
+        """Cast the declared columns of one chunk to their schema dtypes."""
+        columns = {}
+        for name in frame.columns:
+            kind = "string" if name == "animal_id" else schema.get(name)
+            column = frame[name]
+
+            if name == "animal_id":
+                columns[name] = column.astype(str).astype(STRING_DTYPE)
+            elif kind == "datetime":
+                columns[name] = pd.to_datetime(column, errors="coerce")
+            elif kind == "float":
+                columns[name] = pd.to_numeric(column, errors="coerce").astype("float64")
+            elif kind == "string":
+                columns[name] = column.astype(STRING_DTYPE)
+            else:
+                columns[name] = column
+
+        return pd.DataFrame(columns, copy=False)
 
     # ------------------
     # Load Intake Data
@@ -12,11 +305,13 @@ class DataLoader:
     def load_intakes(self, query=None):
         """Load intake records from MongoDB and return a clean DataFrame."""
         try:
+            if self.columnar:
+                return self._load_columnar(query, "intakes", INTAKE_SCHEMA, "intake")
+
             self.logger.info("DataLoader: Loading intake records from MongoDB.")
 
-            # Read from MongoDB
-            data = self.db.read(query if query else {}, collection="intakes")
-            df = pd.DataFrame(data)
+            # Stream from MongoDB in chunks
+            df = self._read_frame(query, collection="intakes", projection=self.projections.get("intakes"))
 
             # ---------------------------------------------------------
             # 1. Remove MongoDB ObjectId
@@ -27,10 +322,7 @@ class DataLoader:
             # ---------------------------------------------------------
             # 2. Standardize column names (NEW Enhancement)
             # ---------------------------------------------------------
-            df.columns = [
-                col.strip().lower().replace(" ", "_")
-                for col in df.columns
-            ]
+            df.columns = [standardize_column(col) for col in df.columns]
 
             # ---------------------------------------------------------
             # 3. Drop records missing animal_id (NEW Algorithm)
@@ -42,7 +334,7 @@ class DataLoader:
                 dropped = before - after
                 self.logger.info(f"DataLoader: Dropped {dropped} intake rows missing animal_id.")
 
-            df["animal_id"] = df["animal_id"].astype(str)
+                df["animal_id"] = df["animal_id"].astype(str)
 
             # ---------------------------------------------------------
             # 4. Convert datetime_intake string → datetime (NEW)
@@ -72,11 +364,13 @@ class DataLoader:
     def load_outcomes(self, query=None):
         """Load outcome CSV Records from MongoDB and return a clean DataFrame."""
         try:
+            if self.columnar:
+                return self._load_columnar(query, "outcomes", OUTCOME_SCHEMA, "outcome")
+
             self.logger.info("Dataloader: Loading outcome records from MongoDB.")
 
-            # Read from MongoDB
-            data = self.db.read(query if query else {}, collection="outcomes")
-            df = pd.DataFrame(data)
+            # Stream from MongoDB in chunks
+            df = self._read_frame(query, collection="outcomes", projection=self.projections.get("outcomes"))
 
             # -------------------------------------------
             # 1. Remove MongoDB ObjectId
@@ -87,10 +381,7 @@ class DataLoader:
             # -------------------------------------------
             # 2. Standardize column names (NEW)
             # -------------------------------------------
-            df.columns = [
-                col.strip().lower().replace(" ", "_")
-                for col in df.columns
-            ]
+            df.columns = [standardize_column(col) for col in df.columns]
 
             # -------------------------------------------
             # 3. Drop rows missing animal_id (NEW Algorithm)
@@ -104,7 +395,7 @@ class DataLoader:
                     f"DataLoader: Dropped {dropped} outcome rows missing animal_id."
                 )
 
-            df["animal_id"] = df["animal_id"].astype(str)
+                df["animal_id"] = df["animal_id"].astype(str)
 
             # -------------------------------------------
             # 4. Convert outcome datetime string → datetime (NEW)
@@ -113,6 +404,9 @@ class DataLoader:
                 df["datetime_outcome"] = pd.to_datetime(
                     df["datetime_outcome"], errors="coerce"
                 )
+            # date_of_birth is a datetime in OUTCOME_SCHEMA too, so both load paths agree
+            if "date_of_birth" in df.columns:
+                df["date_of_birth"] = pd.to_datetime(df["date_of_birth"], errors="coerce")
 
             # -------------------------------------------
             # 5. Set index to animal_id for faster merging (NEW DS)
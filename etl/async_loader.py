@@ -0,0 +1,90 @@
+import asyncio
+
+import pandas as pd
+
+from etl.Data_Loader import COLLECTION_SCHEMAS, DataLoader
+
+
+class AsyncDataLoader(DataLoader):
+    """
+    asyncio version of DataLoader, reading through an AsyncAnimalShelter.
+
+    load_intakes / load_outcomes are coroutines returning the same cleaned,
+    animal_id-indexed frames as the columnar DataLoader path (chunks are decoded
+    as they arrive). load_many() runs any number of independent queries
+    concurrently, at most `concurrency` at a time, so their round trips overlap
+    instead of queueing behind each other.
+
+    From synchronous code: asyncio.run(loader.extract(intake_query, outcome_query)).
+    """
+
+    def __init__(self, db, logger, batch_size=5000, concurrency=8, projections=None):
+        super().__init__(db, logger, batch_size=batch_size, columnar=True, projections=projections)
+        self.concurrency = concurrency
+
+    # ------------------
+    # Single collections
+    # ------------------
+    async def load_intakes(self, query=None):
+        """Load intake records from MongoDB and return a clean DataFrame."""
+        return await self.load("intakes", query)
+
+    async def load_outcomes(self, query=None):
+        """Load outcome records from MongoDB and return a clean DataFrame."""
+        return await self.load("outcomes", query)
+
+    async def load(self, collection, query=None, projection=None):
+        """Stream one query and decode it chunk by chunk; empty frame on failure."""
+        schema, label = COLLECTION_SCHEMAS[collection]
+        try:
+            self.logger.info(f"AsyncDataLoader: Loading {label} records from MongoDB.")
+
+            names = {}  # raw field name -> standardized name
+            frames = []
+            dropped = 0
+            async for chunk in self.db.stream(
+                query or {},
+                collection=collection,
+                projection=projection if projection is not None else self.projections.get(collection),
+                batch_size=self.batch_size,
+                chunk_size=self.batch_size,
+            ):
+                frame, chunk_dropped = self._decode_chunk(chunk, schema, names)
+                dropped += chunk_dropped
+                if frame is not None:
+                    frames.append(frame)
+
+            return self._assemble_columnar(frames, dropped, label)
+
+        except Exception as e:
+            self.logger.error(f"AsyncDataLoader: {label.capitalize()} loading failed: {e}")
+            return pd.DataFrame()
+
+    # ------------------
+    # Concurrent loads
+    # ------------------
+    async def load_many(self, requests):
+        """
+        Run (collection, query) requests concurrently; returns their frames in order.
+
+        e.g. await loader.load_many([("intakes", q1), ("outcomes", q1), ("outcomes", q2)])
+        """
+        limit = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def run(collection, query):
+            async with limit:
+                return await self.load(collection, query)
+
+        return list(await asyncio.gather(*(run(collection, query) for collection, query in requests)))
+
+    async def extract(self, intake_query=None, outcome_query=None):
+        """Load intakes and outcomes at the same time; returns (intakes_df, outcomes_df)."""
+        intakes_df, outcomes_df = await self.load_many(
+            [("intakes", intake_query), ("outcomes", outcome_query)]
+        )
+        return intakes_df, outcomes_df
+
+    async def load_animals(self, animal_ids):
+        """Full intake + outcome history of the given animals (both fetched concurrently)."""
+        query = self.animal_query(animal_ids)
+        return await self.extract(query, query)
@@ -0,0 +1,76 @@
+# benchmark.py – micro-benchmarks for ETL stages
+#
+# Run from the project root:
+#   python -m etl.benchmark [rows]
+
+import sys
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+
+from etl.ETL_Manager import ETLManager
+
+
+def make_intakes(rows=150_000, animals=None, seed=0):
+    """Build a synthetic intake frame shaped like DataLoader output (animal_id index + column)."""
+    rng = np.random.default_rng(seed)
+    animals = animals or max(1, int(rows * 0.8))
+
+    ids = pd.array([f"A{n:06d}" for n in rng.integers(0, animals, rows)], dtype="string")
+    df = pd.DataFrame({
+        "animal_id": ids,
+        "datetime_intake": pd.Timestamp("2013-10-01") + pd.to_timedelta(rng.integers(0, 3650, rows), unit="D"),
+        "breed": rng.choice(["Labrador Retriever Mix", "German Shepherd", "Pit Bull Mix", "Domestic Shorthair"], rows),
+        "age_upon_intake": rng.choice(["1 year", "2 years", "3 months"], rows),
+    })
+    return df.set_index("animal_id", drop=False)
+
+
+def _legacy_deduplicate(df):
+    """The original iterrows/set loop, kept here as the benchmark baseline."""
+    seen = set()
+    unique_rows = []
+
+    for _, row in df.iterrows():
+        aid = row["animal_id"]
+        if aid not in seen:
+            seen.add(aid)
+            unique_rows.append(row)
+
+    return pd.DataFrame(unique_rows).reset_index(drop=True)
+
+
+def _time(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_deduplication(rows=150_000):
+    """Compare the legacy row loop with the vectorized keep-policies."""
+    logger = logging.getLogger("benchmark")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    manager = ETLManager(db=None, logger=logger, loader=None)
+    df = make_intakes(rows)
+
+    results = {"legacy iterrows": _time(_legacy_deduplicate, df, repeat=1)}
+    for keep in ("first", "last", "latest", "all"):
+        results[f"vectorized keep={keep}"] = _time(manager._deduplicate_by_animal, df, keep)
+
+    print(f"Deduplication of {rows} rows:")
+    baseline = results["legacy iterrows"]
+    for name, seconds in results.items():
+        print(f"  {name:<24} {seconds:8.4f}s  ({baseline / seconds:6.1f}x)")
+
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_deduplication(int(sys.argv[1]) if len(sys.argv) > 1 else 150_000)
@@ -0,0 +1,125 @@
+import os
+
+from etl.Data_Loader import INTAKE_SCHEMA, OUTCOME_SCHEMA
+from etl.derived import DERIVED_FIELDS
+from etl.rescue import RESCUE_MASK_COLUMN
+
+
+# ---------------------------------------------------------
+# Column manifest: merged-frame columns each consumer reads.
+# DataLoader turns the manifest into MongoDB projections, so source fields
+# nobody uses are never sent over the wire or decoded.
+# ---------------------------------------------------------
+
+# transform(): join key + the datetimes used by dedup and the watermark
+TRANSFORM_COLUMNS = ["animal_id", "datetime_intake", "datetime_outcome"]
+
+# Dashboard callbacks, charts, map popups and the rollups
+DASHBOARD_COLUMNS = [
+    "breed_intake",
+    "breed_outcome",
+    "outcome_type",
+    "age_upon_outcome_in_weeks",
+    "name_intake",
+    "name_outcome",
+    "location_lat",
+    "location_long",
+]
+
+# DataTable columns shown by default (DASHBOARD_TABLE_COLUMNS in .env overrides,
+# "all" shows every column of the dataset)
+TABLE_COLUMNS = [
+    "animal_id",
+    "name_intake",
+    "animal_type_intake",
+    "breed_intake",
+    "color_intake",
+    "outcome_type",
+    "age_in_years",
+    "datetime_intake",
+    "datetime_outcome",
+    "days_in_shelter",
+    "location_lat",
+    "location_long",
+]
+
+# Inputs of derived fields that do not declare `requires` (looked up dynamically)
+DERIVED_INPUTS = {
+    RESCUE_MASK_COLUMN: ["breed_intake", "breed_outcome", "age_upon_outcome_in_weeks"],
+}
+
+# Raw export names of the standardized fields (documents loaded without ingest.py)
+SOURCE_ALIASES = {
+    "animal_id": ["Animal ID"],
+    "datetime_intake": ["DateTime Intake"],
+    "datetime_outcome": ["DateTime Outcome"],
+    "date_of_birth": ["Date of Birth"],
+    "sex_upon_intake": ["Sex upon Intake"],
+    "sex_upon_outcome": ["Sex upon Outcome"],
+    "age_upon_intake": ["Age upon Intake"],
+    "age_upon_outcome": ["Age upon Outcome"],
+}
+
+SOURCE_SCHEMAS = {"intakes": INTAKE_SCHEMA, "outcomes": OUTCOME_SCHEMA}
+MERGE_SUFFIXES = {"_intake": "intakes", "_outcome": "outcomes"}
+
+
+def table_column_names():
+    """Visible DataTable columns from DASHBOARD_TABLE_COLUMNS, or None for every column."""
+    configured = os.getenv("DASHBOARD_TABLE_COLUMNS", "").strip()
+    if configured.lower() == "all":
+        return None
+    if configured:
+        return [c.strip() for c in configured.split(",") if c.strip()]
+    return list(TABLE_COLUMNS)
+
+
+def dashboard_manifest(table_columns=None):
+    """Every merged column the dashboard needs: transform + callbacks + visible table."""
+    columns = TRANSFORM_COLUMNS + DASHBOARD_COLUMNS
+    table = table_column_names() if table_columns is None else table_columns
+    if table is None:
+        return None  # every column is shown, so every field is loaded
+    return list(dict.fromkeys(columns + list(table)))
+
+
+def source_fields(columns):
+    """
+    Map merged-frame columns to the source fields to load, per collection.
+
+    A field both collections have (breed, name, ...) is loaded from both or from
+    neither, so the merge keeps adding the _intake/_outcome suffixes. Derived
+    columns pull in the inputs of every registered derived field.
+    """
+    wanted = list(columns) + [c for spec in DERIVED_FIELDS.values() for c in spec["requires"]]
+    for name in DERIVED_FIELDS:
+        wanted.extend(DERIVED_INPUTS.get(name, []))
+
+    fields = {collection: {"animal_id"} for collection in SOURCE_SCHEMAS}
+    for column in wanted:
+        base = column
+        if not any(column in schema for schema in SOURCE_SCHEMAS.values()):
+            base = next((column[: -len(s)] for s in MERGE_SUFFIXES if column.endswith(s)), column)
+
+        for collection, schema in SOURCE_SCHEMAS.items():
+            if base in schema:
+                fields[collection].add(base)
+
+    return {collection: sorted(names) for collection, names in fields.items()}
+
+
+def projection(fields):
+    """MongoDB inclusion projection for standardized fields (raw export names included)."""
+    spec = {}
+    for field in fields:
+        spec[field] = 1
+        for alias in SOURCE_ALIASES.get(field, [" ".join(w.capitalize() for w in field.split("_"))]):
+            spec[alias] = 1
+    return spec
+
+
+def source_projections(columns):
+    """{collection: projection} for a column manifest; None loads every field."""
+    if columns is None:
+        return {}
+    return {collection: projection(fields) for collection, fields in source_fields(columns).items()}
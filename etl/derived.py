@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+from etl.rescue import RESCUE_MASK_COLUMN, rescue_bitmask
+
+
+# Breeds flagged by is_working_dog (compared lowercased)
+WORKING_BREEDS = {
+    "german shepherd dog",
+    "labrador retriever",
+    "golden retriever",
+    "belgian malinois",
+    "border collie",
+    "australian cattle dog",
+}
+
+
+# ---------------------------------------------------------
+# Derived field registry
+# name -> {"expr": callable(df) | pandas.eval string,
+#          "requires": columns that must exist,
+#          "default": callable(df) used when a required column is missing (None = skip)}
+# Fields are computed in registration order, so later fields can use earlier ones.
+# ---------------------------------------------------------
+DERIVED_FIELDS = {}
+
+
+def register_derived_field(name, expr, requires=(), default=None):
+    """
+    Register (or replace) a derived column computed by transform().
+
+    expr is either a callable taking the merged frame and returning a column, or a
+    column expression string for DataFrame.eval (e.g. "days_in_shelter / 7").
+    Registered fields run in every transform, including the partitioned worker
+    processes, so register them at import time.
+    """
+    if not callable(expr) and not isinstance(expr, str):
+        raise ValueError(f"Derived field '{name}' needs a callable or an expression string.")
+
+    if isinstance(requires, str):
+        requires = (requires,)
+    DERIVED_FIELDS[name] = {"expr": expr, "requires": tuple(requires), "default": default}
+
+
+def compute_derived_fields(df: pd.DataFrame, fields: dict = None) -> pd.DataFrame:
+    """Add every registered derived field to df (in place) and return it."""
+    for name, spec in (fields or DERIVED_FIELDS).items():
+        if all(col in df.columns for col in spec["requires"]):
+            expr = spec["expr"]
+            df[name] = df.eval(expr) if isinstance(expr, str) else expr(df)
+        elif spec["default"] is not None:
+            df[name] = spec["default"](df)
+    return df
+
+
+# ---------------------------------------------------------
+# Vectorized helpers
+# ---------------------------------------------------------
+def as_datetime(column: pd.Series) -> pd.Series:
+    """Return column as datetime64, parsing only when it is not one already."""
+    if pd.api.types.is_datetime64_any_dtype(column.dtype):
+        return column
+    return pd.to_datetime(column, errors="coerce")
+
+
+def isin_lowercase(column: pd.Series, values) -> np.ndarray:
+    """Case-insensitive membership test evaluated once per distinct value."""
+    codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    hits = pd.Index(uniques).astype(str).str.lower().isin(values)
+    return np.where(codes >= 0, hits[np.where(codes >= 0, codes, 0)], False)
+
+
+def _breed_column(df):
+    return next((c for c in ("breed_outcome", "breed_intake", "breed") if c in df.columns), None)
+
+
+def _breed(df):
+    """Breed per row: breed_outcome, else breed_intake (stays without an outcome), else breed."""
+    columns = [df[c] for c in ("breed_outcome", "breed_intake", "breed") if c in df.columns]
+    if not columns:
+        return None
+    breed = columns[0]
+    for column in columns[1:]:
+        breed = breed.fillna(column)
+    return breed
+
+
+# ---------------------------------------------------------
+# Built-in fields
+# ---------------------------------------------------------
+register_derived_field(
+    "age_in_years",
+    lambda df: pd.to_numeric(df["age_upon_outcome_in_weeks"], errors="coerce") / 52.0,
+    requires="age_upon_outcome_in_weeks",
+)
+register_derived_field(
+    "intake_years",
+    lambda df: as_datetime(df["datetime_intake"]).dt.year.astype("Int16"),
+    requires="datetime_intake",
+)
+register_derived_field(
+    "outcome_years",
+    lambda df: as_datetime(df["datetime_outcome"]).dt.year.astype("Int16"),
+    requires="datetime_outcome",
+)
+register_derived_field(
+    "days_in_shelter",
+    lambda df: (
+        as_datetime(df["datetime_outcome"]) - as_datetime(df["datetime_intake"])
+    ).dt.days.astype("Int32"),
+    requires=("datetime_intake", "datetime_outcome"),
+    default=lambda df: pd.array([pd.NA] * len(df), dtype="Int32"),
+)
+register_derived_field(
+    "is_working_dog",
+    lambda df: (
+        isin_lowercase(_breed(df), WORKING_BREEDS)
+        if _breed_column(df)
+        else np.zeros(len(df), dtype=bool)
+    ),
+)
+register_derived_field(
+    RESCUE_MASK_COLUMN,
+    lambda df: (
+        rescue_bitmask(df[_breed_column(df)], df.get("age_in_years"))
+        if _breed_column(df)
+        else np.zeros(len(df), dtype=np.uint8)
+    ),
+)
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+
+# Join modes understood by merge_and_derive / ETLManager(join=...)
+#   "animal": one row per animal (deduplicated sides, left merge on animal_id)
+#   "stay":   one row per intake, paired with that stay's outcome (as-of join)
+JOIN_MODES = ("animal", "stay")
+
+MERGE_SUFFIXES = ("_intake", "_outcome")
+
+
+def _times(column: pd.Series) -> np.ndarray:
+    """Datetimes as int64 nanoseconds; NaT (or unparseable) becomes the int64 minimum."""
+    times = pd.to_datetime(column, errors="coerce")
+    return times.to_numpy(dtype="datetime64[ns]").view("i8")
+
+
+def stay_outcome_positions(intake_ids, intake_times, outcome_ids, outcome_times) -> np.ndarray:
+    """
+    For each intake, the position of its stay's outcome, or -1.
+
+    An intake is paired with the first outcome of the same animal at or after its
+    datetime (datetime_intake <= datetime_outcome). When several intakes of one animal
+    reach the same outcome, only the latest intake keeps it: the earlier visits ended
+    without a recorded outcome. Intakes or outcomes without a datetime never match.
+
+    This is a sort-merge: animal ids are factorized to integer codes and every
+    datetime is replaced by its rank, so (code, rank) packs into one int64 key. Both
+    key arrays are sorted once and merged; memory is a handful of int64 arrays per row.
+    """
+    n_in = len(intake_ids)
+    positions = np.full(n_in, -1, dtype=np.int64)
+    if n_in == 0 or len(outcome_ids) == 0:
+        return positions
+
+    # Factorizing a Series keeps Arrow-backed ids on the fast dictionary-encode path
+    codes, _ = pd.factorize(
+        pd.concat([pd.Series(intake_ids), pd.Series(outcome_ids)], ignore_index=True).astype(str)
+    )
+    in_codes, out_codes = codes[:n_in].astype(np.int64), codes[n_in:].astype(np.int64)
+
+    nat = np.iinfo(np.int64).min
+    in_valid = (in_codes >= 0) & (intake_times != nat)
+    out_valid = np.flatnonzero((out_codes >= 0) & (outcome_times != nat))
+    if not in_valid.any() or len(out_valid) == 0:
+        return positions
+
+    # Dense time ranks shared by both sides keep the packed key inside int64
+    uniques, ranks = np.unique(
+        np.concatenate([intake_times[in_valid], outcome_times[out_valid]]), return_inverse=True
+    )
+    span = np.int64(len(uniques))
+    in_keys = in_codes[in_valid] * span + ranks[: in_valid.sum()]
+    out_keys = out_codes[out_valid] * span + ranks[in_valid.sum():]
+
+    # Sorted outcome keys; the first key >= an intake's key is its next outcome.
+    # Intake keys are searched in sorted order too, which walks the outcome array
+    # front to back (a merge) instead of jumping around it.
+    order = np.argsort(out_keys, kind="stable")
+    out_keys = out_keys[order]
+    in_order = np.argsort(in_keys, kind="stable")
+    found = np.empty(len(in_keys), dtype=np.int64)
+    found[in_order] = np.searchsorted(out_keys, in_keys[in_order], side="left")
+
+    hit = found < len(out_keys)
+    hit[hit] = (out_keys[found[hit]] // span) == in_codes[in_valid][hit]
+
+    matched = np.full(len(in_keys), -1, dtype=np.int64)
+    matched[hit] = out_valid[order[found[hit]]]
+
+    # One outcome closes one stay: the latest intake before it wins
+    claimed = np.flatnonzero(matched >= 0)
+    if len(claimed):
+        by_outcome = claimed[np.lexsort((in_keys[claimed], matched[claimed]))]
+        last = np.append(matched[by_outcome][1:] != matched[by_outcome][:-1], True)
+        matched[by_outcome[~last]] = -1
+
+    positions[np.flatnonzero(in_valid)] = matched
+    return positions
+
+
+def join_stays(intakes_df: pd.DataFrame, outcomes_df: pd.DataFrame,
+               suffixes=MERGE_SUFFIXES) -> pd.DataFrame:
+    """
+    Pair every intake with its stay's outcome (see stay_outcome_positions).
+
+    Returns one row per intake in intake order, with the outcome columns of its
+    stay (missing when the stay has no outcome yet) and the same column naming
+    as the animal_id left merge: shared columns get the _intake/_outcome suffixes.
+    """
+    intakes_df = intakes_df.reset_index(drop=True)
+    outcomes_df = outcomes_df.reset_index(drop=True)
+
+    positions = stay_outcome_positions(
+        intakes_df["animal_id"],
+        _times(intakes_df["datetime_intake"]) if "datetime_intake" in intakes_df.columns
+        else np.full(len(intakes_df), np.iinfo(np.int64).min),
+        outcomes_df["animal_id"],
+        _times(outcomes_df["datetime_outcome"]) if "datetime_outcome" in outcomes_df.columns
+        else np.full(len(outcomes_df), np.iinfo(np.int64).min),
+    )
+
+    # Outcome rows in intake order; -1 is not a label, so unmatched rows come back missing
+    right = outcomes_df.drop(columns=["animal_id"]).reindex(positions).reset_index(drop=True)
+
+    shared = set(intakes_df.columns) & set(right.columns)
+    left = intakes_df.rename(columns={c: f"{c}{suffixes[0]}" for c in shared})
+    right = right.rename(columns={c: f"{c}{suffixes[1]}" for c in shared})
+    return pd.concat([left, right], axis=1)
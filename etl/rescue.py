@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+
+# ---------------------------------------------------------
+# Rescue category definitions (shared by ETL + dashboard)
+# name -> (bit, breed keywords, max age in years)
+# ---------------------------------------------------------
+RESCUE_CATEGORIES = {
+    "water": (1, ("Labrador", "Retriever", "Newfoundland"), 2),
+    "mountain": (2, ("German Shepherd", "Malamute", "Sheepdog"), 3),
+    "disaster": (4, ("Doberman", "German Shepherd", "Bloodhound"), 3),
+}
+
+RESCUE_MASK_COLUMN = "rescue_mask"
+
+
+def rescue_bitmask(breeds: pd.Series, ages: pd.Series = None) -> np.ndarray:
+    """
+    Compute a uint8 bitmask per row: bit set when the breed matches a category's
+    keywords (case-insensitive partial match) and the age is within its limit.
+
+    Keyword matching runs once per distinct breed, not once per row, so the cost
+    is driven by breed cardinality. Rows with an unknown age never qualify when
+    ages are given, same as the dashboard's original age filter.
+    """
+    if isinstance(breeds.dtype, pd.CategoricalDtype):
+        # Already encoded: reuse the category codes
+        codes = breeds.cat.codes.to_numpy()
+        uniques = pd.Series(breeds.cat.categories.astype(str), dtype=object).str.lower()
+    else:
+        codes, uniques = pd.factorize(breeds.astype(str).str.lower(), use_na_sentinel=True)
+        uniques = pd.Series(uniques, dtype=object)
+
+    # Match each distinct keyword against the distinct breeds once
+    keyword_hits = {}
+    for _, keywords, _ in RESCUE_CATEGORIES.values():
+        for keyword in keywords:
+            if keyword not in keyword_hits:
+                keyword_hits[keyword] = uniques.str.contains(keyword.lower(), regex=False).to_numpy(dtype=bool)
+
+    if ages is not None:
+        ages = pd.to_numeric(ages, errors="coerce").to_numpy(dtype=float)
+
+    mask = np.zeros(len(breeds), dtype=np.uint8)
+    if len(uniques) == 0:
+        # Every breed missing: nothing can match
+        return mask
+
+    valid = codes >= 0
+    for bit, keywords, age_limit in RESCUE_CATEGORIES.values():
+        breed_hit = np.zeros(len(uniques), dtype=bool)
+        for keyword in keywords:
+            breed_hit |= keyword_hits[keyword]
+
+        row_hit = valid & breed_hit[np.where(valid, codes, 0)]
+        if ages is not None:
+            row_hit &= ages <= age_limit  # NaN compares False
+
+        mask[row_hit] |= bit
+
+    return mask
+
+
+def category_mask(bitmask, categories, match="any") -> np.ndarray:
+    """
+    Boolean row mask for one or more rescue categories from a precomputed bitmask.
+
+    match="any" ORs the categories, match="all" ANDs them.
+    """
+    if isinstance(categories, str):
+        categories = [categories]
+
+    bits = 0
+    for name in categories:
+        bits |= RESCUE_CATEGORIES[name][0]
+
+    values = np.asarray(bitmask, dtype=np.uint8)
+    if match == "all":
+        return (values & bits) == bits
+    return (values & bits) != 0
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+from CRUD_Python_Module.crud import ROLLUP_COLLECTIONS
+from etl.rescue import RESCUE_MASK_COLUMN
+
+
+# ---------------------------------------------------------
+# Rollup definitions: name -> (key columns, measure columns)
+# ---------------------------------------------------------
+ROLLUP_SPECS = {
+    "breed_outcome_year": (["breed", "outcome_type", "outcome_year"], ["count"]),
+    "age_group": (["age_group"], ["count"]),
+    "days_in_shelter": (["outcome_type"], ["days_sum", "days_count"]),
+    "rescue_breed": (["breed", RESCUE_MASK_COLUMN], ["count"]),
+}
+
+# Age buckets (years) for the age-group histogram
+AGE_GROUP_BINS = [0, 1, 3, 7, np.inf]
+AGE_GROUP_LABELS = ["Under 1", "1-3", "3-7", "7+"]
+
+
+def _first_column(df, candidates):
+    return next((c for c in candidates if c in df.columns), None)
+
+
+def rollup_frames(df: pd.DataFrame) -> dict:
+    """Compute every rollup of a merged dataset as {name: DataFrame(keys + measures)}."""
+    n = len(df)
+    breed_col = _first_column(df, ("breed_outcome", "breed_intake", "breed"))
+    missing = pd.Series([None] * n, index=df.index, dtype=object)
+
+    base = pd.DataFrame({
+        "breed": df[breed_col].astype(object) if breed_col else missing,
+        "outcome_type": df["outcome_type"].astype(object) if "outcome_type" in df.columns else missing,
+        "outcome_year": df["outcome_years"].astype(object) if "outcome_years" in df.columns else missing,
+        "age_group": (
+            pd.cut(pd.to_numeric(df["age_in_years"], errors="coerce"), AGE_GROUP_BINS,
+                   labels=AGE_GROUP_LABELS, right=False).astype(object)
+            if "age_in_years" in df.columns else missing
+        ),
+        RESCUE_MASK_COLUMN: df[RESCUE_MASK_COLUMN].astype(int) if RESCUE_MASK_COLUMN in df.columns else 0,
+        "days": (
+            pd.to_numeric(df["days_in_shelter"], errors="coerce").astype(float)
+            if "days_in_shelter" in df.columns else np.nan
+        ),
+    }, index=df.index)
+
+    frames = {}
+    for name, (keys, measures) in ROLLUP_SPECS.items():
+        grouped = base.groupby(keys, dropna=False, sort=False)
+        if name == "days_in_shelter":
+            frame = grouped["days"].agg(days_sum="sum", days_count="count")
+        else:
+            frame = grouped.size().to_frame("count")
+        frames[name] = frame.reset_index()
+
+    return frames
+
+
+def touched_rollups(added: pd.DataFrame, removed: pd.DataFrame = None) -> dict:
+    """Rollup keys (key columns only) that adding `added` and dropping `removed` rows can change."""
+    parts = [rollup_frames(added)]
+    if removed is not None and len(removed):
+        parts.append(rollup_frames(removed))
+    return {
+        name: pd.concat([part[name][keys] for part in parts], ignore_index=True)
+        for name, (keys, _) in ROLLUP_SPECS.items()
+    }
+
+
+def combine_rollups(parts: list) -> dict:
+    """Add up rollups computed on disjoint slices of a dataset (e.g. animal_id partitions)."""
+    combined = {}
+    for name, (keys, measures) in ROLLUP_SPECS.items():
+        frames = [part[name] for part in parts if len(part[name])]
+        if not frames:
+            combined[name] = pd.DataFrame(columns=keys + measures)
+            continue
+        combined[name] = (
+            pd.concat(frames, ignore_index=True)
+            .groupby(keys, dropna=False, sort=False)[measures].sum()
+            .reset_index()
+        )
+    return combined
+
+
+def rollup_documents(frame: pd.DataFrame, keys: list, measures: list) -> list:
+    """Turn a rollup frame into MongoDB documents keyed by a compound _id."""
+    documents = []
+    for record in frame.to_dict("records"):
+        key = {k: _plain(record[k]) for k in keys}
+        documents.append({
+            "_id": key,
+            **key,
+            **{m: _plain(record[m]) for m in measures},
+        })
+    return documents
+
+
+def _plain(value):
+    """Convert numpy/pandas scalars (and missing values) into BSON-friendly Python values."""
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        value = float(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value.item() if hasattr(value, "item") else value
+
+
+def write_rollups(db, frames: dict, touched: dict = None):
+    """
+    Write rollup frames, computed on the whole dataset, to their collections.
+
+    Without touched every collection is replaced wholesale. With touched
+    (touched_rollups) only those keys are rewritten: set to their value in frames,
+    or deleted when frames no longer has them. Values are absolute, not increments,
+    so the same change written twice (by another worker, or a retry) leaves the
+    same rollups.
+    """
+    written = {}
+    for name, (keys, measures) in ROLLUP_SPECS.items():
+        documents = rollup_documents(frames[name], keys, measures)
+        collection = ROLLUP_COLLECTIONS[name]
+        if touched is None:
+            written[name] = db.replace_collection(documents, collection)
+            continue
+
+        touched_keys = {_key(doc["_id"]) for doc in rollup_documents(touched[name], keys, [])}
+        changed = [doc for doc in documents if _key(doc["_id"]) in touched_keys]
+        vanished = touched_keys - {_key(doc["_id"]) for doc in changed}
+        written[name] = db.set_documents(changed, collection, delete_ids=[dict(key) for key in vanished])
+    return written
+
+
+def _key(rollup_id: dict):
+    """Hashable form of a compound rollup _id (field order preserved)."""
+    return tuple(rollup_id.items())
@@ -0,0 +1,163 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from etl.state import DEFAULT_STATE_DIR
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    feather = None
+
+try:
+    import fcntl  # POSIX only: serializes the loader across worker processes
+except ImportError:
+    fcntl = None
+
+
+# pandas nullable dtypes restored from the file's pandas metadata after a zero-copy attach
+NULLABLE_DTYPES = {
+    "Int8", "Int16", "Int32", "Int64", "UInt8", "UInt16", "UInt32", "UInt64",
+    "Float32", "Float64", "boolean",
+}
+
+# Directory (under the ETL state dir) holding the shared dataset file + its sidecar
+SHARED_DIR = "shared"
+SHARED_DATASET_FILE = "dataset.arrow"
+
+
+class SharedDataset:
+    """
+    One memory-mapped Arrow copy of the merged dataset shared by every dashboard worker.
+
+    A single loader process publishes the frame as an uncompressed Arrow IPC (Feather v2)
+    file; workers attach by memory-mapping it. Text columns stay Arrow-backed on the
+    mapped pages and numeric columns without nulls are wrapped as-is, so those bytes
+    live once in the OS page cache instead of once per worker. Categoricals only copy
+    their small integer codes; nullable / datetime columns with nulls are copied.
+
+    Publishing writes a new file and renames it into place, so workers that already
+    attached keep reading the old (still mapped) file until they re-attach.
+    """
+
+    def __init__(self, state_dir=DEFAULT_STATE_DIR):
+        if feather is None:
+            raise ImportError("SharedDataset needs pyarrow installed.")
+
+        self.shared_dir = os.path.join(state_dir, SHARED_DIR)
+        self.path = os.path.join(self.shared_dir, SHARED_DATASET_FILE)
+        self.meta_path = f"{self.path}.json"
+
+    # -------------------------------
+    # Loader side
+    # -------------------------------
+    def publish(self, df, version):
+        """Write df as the shared dataset (atomically) and return its metadata."""
+        os.makedirs(self.shared_dir, exist_ok=True)
+
+        table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+        # pandas keeps Arrow strings as large_string; storing them that way means
+        # attaching needs no cast (which would copy every offsets buffer)
+        table = table.cast(pa.schema([
+            field.with_type(pa.large_string()) if pa.types.is_string(field.type) else field
+            for field in table.schema
+        ], metadata=table.schema.metadata))
+
+        # One record batch: each numeric column is one contiguous buffer numpy can
+        # wrap directly (several chunks would be concatenated, i.e. copied, per worker)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        feather.write_feather(table, tmp_path, compression="uncompressed",
+                              chunksize=max(table.num_rows, 1))
+        os.replace(tmp_path, self.path)
+
+        meta = {"version": version, "rows": len(df), "published_at": time.time()}
+        with open(f"{self.meta_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(f"{self.meta_path}.tmp", self.meta_path)
+        return meta
+
+    def metadata(self):
+        """Sidecar of the published dataset, or None if nothing is published."""
+        if not os.path.exists(self.path) or not os.path.exists(self.meta_path):
+            return None
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # -------------------------------
+    # Worker side
+    # -------------------------------
+    def attach(self):
+        """Return (df, metadata) backed by the memory-mapped file, or (None, None)."""
+        meta = self.metadata()
+        if meta is None:
+            return None, None
+
+        # memory_map=True: Arrow buffers point into the mapping instead of heap copies.
+        # The pandas metadata is ignored during conversion (honouring it copies
+        # every column); only the few nullable integer columns are re-typed after.
+        table = feather.read_table(self.path, memory_map=True)
+        df = table.to_pandas(types_mapper=_arrow_backed_strings, split_blocks=True, ignore_metadata=True)
+
+        for column in (table.schema.pandas_metadata or {}).get("columns", []):
+            name, dtype = column.get("name"), column.get("numpy_type")
+            if dtype in NULLABLE_DTYPES and name in df.columns and str(df[name].dtype) != dtype:
+                df[name] = df[name].astype(dtype)
+        return df, meta
+
+    def attach_or_publish(self, build, timeout=None):
+        """
+        Attach to the published dataset; if there is none, exactly one process calls
+        build() -> (df, version) and publishes it while the others wait on a file lock.
+        """
+        df, meta = self.attach()
+        if df is not None:
+            return df, meta
+
+        with self.loader_lock(timeout):
+            # Another worker may have published while we waited for the lock
+            df, meta = self.attach()
+            if df is not None:
+                return df, meta
+
+            frame, version = build()
+            self.publish(frame, version)
+
+        return self.attach()
+
+    @contextmanager
+    def loader_lock(self, timeout=None):
+        """File lock held by the one process that builds + publishes the dataset."""
+        os.makedirs(self.shared_dir, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+
+        with open(os.path.join(self.shared_dir, ".loader.lock"), "w") as lock_file:
+            started = time.monotonic()
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if timeout is not None and time.monotonic() - started > timeout:
+                        raise TimeoutError("Timed out waiting for the shared dataset loader.")
+                    time.sleep(0.2)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _arrow_backed_strings(arrow_type):
+    """types_mapper: keep text columns as Arrow strings (zero-copy) instead of Python objects."""
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype("pyarrow")
+    return None
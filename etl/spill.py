@@ -0,0 +1,254 @@
+import glob
+import math
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+from bson import json_util
+
+from etl.state import DEFAULT_STATE_DIR, read_arrow, write_arrow
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+
+# Memory budget of an out-of-core run when neither the caller, ETL_MEMORY_LIMIT_MB
+# nor a container (cgroup) limit says otherwise
+DEFAULT_MEMORY_LIMIT_MB = 512
+
+# cgroup v2 / v1 files holding the container's memory cap
+CGROUP_MEMORY_FILES = ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes")
+
+# Directories (under the ETL state dir) for spilled partitions and finished datasets
+SPILL_DIR = "spill"
+DATASETS_DIR = "datasets"
+MANIFEST_FILE = "manifest.json"
+
+
+def memory_limit_bytes(memory_limit_mb=None):
+    """
+    Memory budget for out-of-core runs: the argument, else ETL_MEMORY_LIMIT_MB,
+    else half the container's cgroup limit, else DEFAULT_MEMORY_LIMIT_MB.
+    """
+    configured = memory_limit_mb or os.getenv("ETL_MEMORY_LIMIT_MB")
+    if configured:
+        return int(float(configured) * 1024 * 1024)
+
+    for path in CGROUP_MEMORY_FILES:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # "max" (v2) or a huge sentinel (v1) means no limit
+        if value.isdigit() and int(value) < 1 << 60:
+            return int(value) // 2
+
+    return DEFAULT_MEMORY_LIMIT_MB * 1024 * 1024
+
+
+def hash_partitions(ids, partitions) -> np.ndarray:
+    """animal_id hash partition (0 .. partitions-1) of every id; all rows of an animal share one."""
+    hashed = pd.util.hash_pandas_object(pd.Series(ids).astype(str), index=False)
+    return (hashed.to_numpy() % partitions).astype(np.int64)
+
+
+def plan_partitions(rows, row_bytes, memory_limit, expansion):
+    """Partitions needed so one partition, grown `expansion` times by the transform, fits the budget."""
+    return max(1, math.ceil(rows * row_bytes * expansion / max(1, memory_limit)))
+
+
+def _write_frame(df, directory, stem):
+    """Write df as <stem>.feather (uncompressed Arrow IPC), or <stem>.pkl if Arrow cannot store it."""
+    df = df.reset_index(drop=True)
+    if feather is not None:
+        path = os.path.join(directory, f"{stem}.feather")
+        try:
+            write_arrow(df, path)
+            return os.path.basename(path)
+        except Exception:
+            # e.g. mixed-type object columns Arrow cannot represent
+            if os.path.exists(path):
+                os.remove(path)
+
+    path = os.path.join(directory, f"{stem}.pkl")
+    df.to_pickle(path)
+    return os.path.basename(path)
+
+
+def _read_frame(path, columns=None):
+    if path.endswith(".feather"):
+        return read_arrow(path, columns)
+    df = pd.read_pickle(path)
+    return df[[c for c in columns if c in df.columns]] if columns is not None else df
+
+
+class PartitionSpill:
+    """
+    One collection split into animal_id hash partitions on local disk.
+
+    append() splits each decoded chunk by partition into in-memory buffers; once the
+    buffers hold more than buffer_bytes they are written out as one Arrow run file per
+    partition. read(p) returns partition p's rows in the order they were appended, so
+    the per-animal dedup policies ("first", "last") pick the same rows as on the whole
+    collection.
+    """
+
+    def __init__(self, spill_dir, name, partitions, buffer_bytes):
+        self.directory = os.path.join(spill_dir, name)
+        os.makedirs(self.directory, exist_ok=True)
+        self.partitions = partitions
+        self.buffer_bytes = buffer_bytes
+
+        self.buffers = [[] for _ in range(partitions)]
+        self.buffered = 0
+        self.runs = [[] for _ in range(partitions)]
+        self.rows = 0
+        self.flushes = 0
+        # Zero-row frame with the spilled columns, returned for partitions without rows
+        self.template = None
+
+    def append(self, frame):
+        if frame is None or frame.empty:
+            return
+        if self.template is None:
+            self.template = frame.iloc[:0].reset_index(drop=True)
+
+        frame = frame.reset_index(drop=True)
+        parts = hash_partitions(frame["animal_id"], self.partitions)
+        order = np.argsort(parts, kind="stable")
+        bounds = np.searchsorted(parts[order], np.arange(self.partitions + 1))
+        for p in range(self.partitions):
+            if bounds[p] < bounds[p + 1]:
+                self.buffers[p].append(frame.iloc[order[bounds[p]:bounds[p + 1]]])
+
+        self.rows += len(frame)
+        self.buffered += int(frame.memory_usage(deep=True).sum())
+        if self.buffered >= self.buffer_bytes:
+            self.flush()
+
+    def flush(self):
+        """Write every non-empty buffer as the next run of its partition."""
+        for p, pieces in enumerate(self.buffers):
+            if not pieces:
+                continue
+            run = pieces[0] if len(pieces) == 1 else pd.concat(pieces, ignore_index=True)
+            self.runs[p].append(_write_frame(run, self.directory, f"part-{p:05d}-run-{len(self.runs[p]):05d}"))
+        self.buffers = [[] for _ in range(self.partitions)]
+        self.buffered = 0
+        self.flushes += 1
+
+    def read(self, partition):
+        """All rows of one partition (append order), or a zero-row frame with the spilled columns."""
+        frames = [_read_frame(os.path.join(self.directory, run)) for run in self.runs[partition]]
+        if not frames:
+            return self.template.copy() if self.template is not None else pd.DataFrame()
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    def remove(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class PartitionedDataset:
+    """
+    A merged dataset stored as one file per animal_id partition plus a manifest.
+
+    <state_dir>/datasets/<name>/part-00000.feather ... and manifest.json, written last,
+    so a directory without a manifest is an unfinished run. Partitions can be read one
+    at a time (iter_partitions) or, when the whole dataset fits, together (read).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.files = {}
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.path, MANIFEST_FILE)
+
+    def manifest(self):
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json_util.loads(f.read())
+
+    # -------------------------------
+    # Write
+    # -------------------------------
+    def write_partition(self, partition, df):
+        self.files[partition] = _write_frame(df, self.path, f"part-{partition:05d}")
+        return self.files[partition]
+
+    def commit(self, meta):
+        """Write the manifest (atomically), which marks the dataset complete."""
+        manifest = {**meta, "files": [self.files[p] for p in sorted(self.files)], "created_at": time.time()}
+        with open(f"{self.manifest_path}.tmp", "w", encoding="utf-8") as f:
+            f.write(json_util.dumps(manifest, indent=2))
+        os.replace(f"{self.manifest_path}.tmp", self.manifest_path)
+        return manifest
+
+    # -------------------------------
+    # Read
+    # -------------------------------
+    def iter_partitions(self, columns=None):
+        """Yield the dataset one partition frame at a time."""
+        for data_file in self.manifest()["files"]:
+            yield _read_frame(os.path.join(self.path, data_file), columns)
+
+    def read(self, columns=None):
+        """The whole dataset as one frame (only for datasets that fit in memory)."""
+        frames = list(self.iter_partitions(columns))
+        if not frames:
+            return pd.DataFrame()
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+class DatasetStore:
+    """Finished PartitionedDatasets under the ETL state dir; keeps the newest `keep`."""
+
+    def __init__(self, state_dir=DEFAULT_STATE_DIR, keep=2):
+        self.datasets_dir = os.path.join(state_dir, DATASETS_DIR)
+        self.keep = keep
+
+    def create(self, transform_version):
+        path = os.path.join(self.datasets_dir, f"dataset-v{transform_version}-{int(time.time() * 1000)}")
+        os.makedirs(path)
+        return PartitionedDataset(path)
+
+    def _complete(self):
+        """Datasets with a manifest, newest first."""
+        datasets = []
+        for path in glob.glob(os.path.join(self.datasets_dir, "dataset-*")):
+            dataset = PartitionedDataset(path)
+            try:
+                datasets.append((dataset.manifest().get("created_at", 0), dataset))
+            except (OSError, ValueError):
+                continue
+        return [dataset for _, dataset in sorted(datasets, key=lambda d: d[0], reverse=True)]
+
+    def latest(self, transform_version):
+        """Newest complete dataset built by this transform version, or None."""
+        for dataset in self._complete():
+            if dataset.manifest().get("transform_version") == transform_version:
+                return dataset
+        return None
+
+    def prune(self):
+        """
+        Keep the newest `keep` complete datasets. Unfinished directories older than the
+        newest complete dataset are left over from failed runs and are removed too.
+        """
+        complete = self._complete()
+        if not complete:
+            return
+        newest = complete[0].manifest().get("created_at", 0)
+        for dataset in complete[self.keep:]:
+            shutil.rmtree(dataset.path, ignore_errors=True)
+
+        finished = {dataset.path for dataset in complete}
+        for path in glob.glob(os.path.join(self.datasets_dir, "dataset-*")):
+            if path not in finished and os.path.getmtime(path) < newest:
+                shutil.rmtree(path, ignore_errors=True)
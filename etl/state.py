@@ -0,0 +1,175 @@
+import glob
+import hashlib
+import os
+import time
+
+import pandas as pd
+from bson import json_util
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
+
+
+# Default location for persisted ETL state (project root / etl_state)
+DEFAULT_STATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "etl_state")
+
+
+def fingerprint(sources):
+    """Short stable hash of a source description (counts, max _id, ...)."""
+    return hashlib.sha1(json_util.dumps(sources, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def write_arrow(df, path):
+    """
+    Write df as one uncompressed Feather record batch. A single chunk per column is
+    what lets read_arrow hand numeric columns to pandas without copying them.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    try:
+        table = table.combine_chunks()
+    except pa.ArrowInvalid:
+        # Column too large for one chunk: keep the chunks, reads copy those columns
+        pass
+    feather.write_feather(table, path, compression="uncompressed", chunksize=max(1, table.num_rows))
+
+
+def read_arrow(path, columns=None):
+    """
+    Read a Feather file memory-mapped. Numeric columns without nulls stay views of
+    the mapped file (read-only, paged in on use); strings and columns with nulls are
+    converted, so only those cost memory up front.
+    """
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+class SnapshotStore:
+    """
+    Versioned snapshots of the merged dashboard dataset.
+
+    Each snapshot is a data file (uncompressed Feather when pyarrow is installed,
+    pickle otherwise or when a column cannot be stored in Arrow) plus a JSON sidecar
+    holding the transform version, the source fingerprint and the per-collection
+    watermarks that describe it. Feather snapshots are read memory-mapped (read_arrow).
+    """
+
+    def __init__(self, state_dir=DEFAULT_STATE_DIR, keep=3):
+        self.state_dir = state_dir
+        self.keep = keep
+
+    # -------------------------------
+    # Read
+    # -------------------------------
+    def _metadata(self):
+        """All snapshot sidecars, newest first."""
+        entries = []
+        for path in glob.glob(os.path.join(self.state_dir, "snapshot-*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    meta = json_util.loads(f.read())
+            except (OSError, ValueError):
+                continue
+            meta["meta_path"] = path
+            entries.append(meta)
+
+        return sorted(entries, key=lambda m: m.get("created_at", 0), reverse=True)
+
+    def latest_metadata(self, transform_version):
+        """Sidecar of the newest snapshot built by this transform version, or None."""
+        for meta in self._metadata():
+            data_path = os.path.join(self.state_dir, meta.get("data_file", ""))
+            if meta.get("transform_version") == transform_version and os.path.exists(data_path):
+                return meta
+        return None
+
+    def load_latest(self, transform_version):
+        """Return (DataFrame, metadata) for the newest readable snapshot, or (None, None)."""
+        for meta in self._metadata():
+            if meta.get("transform_version") != transform_version:
+                continue
+            try:
+                return self._read(meta), meta
+            except Exception:
+                # Corrupt or half-written snapshot: fall back to an older one
+                continue
+        return None, None
+
+    def _read(self, meta):
+        data_path = os.path.join(self.state_dir, meta["data_file"])
+        if meta.get("format") == "feather":
+            return read_arrow(data_path)
+        return pd.read_pickle(data_path)
+
+    def snapshot_metadata(self, version):
+        """Sidecar of the snapshot named version (its data file stem), or None if pruned."""
+        for meta in self._metadata():
+            if os.path.splitext(meta.get("data_file", ""))[0] == version:
+                return meta
+        return None
+
+    def load_watermarks(self, transform_version):
+        meta = self.latest_metadata(transform_version)
+        return meta.get("watermarks", {}) if meta else {}
+
+    # -------------------------------
+    # Write
+    # -------------------------------
+    def save(self, df, transform_version, source_fingerprint, watermarks):
+        """Write a new snapshot atomically (data first, then sidecar) and prune old ones."""
+        os.makedirs(self.state_dir, exist_ok=True)
+
+        created_at = time.time()
+        stem = f"snapshot-v{transform_version}-{int(created_at * 1000)}-{source_fingerprint}"
+
+        fmt, data_file = self._write_data(df.reset_index(drop=True), stem)
+
+        meta = {
+            "transform_version": transform_version,
+            "fingerprint": source_fingerprint,
+            "watermarks": watermarks,
+            "created_at": created_at,
+            "rows": len(df),
+            "format": fmt,
+            "data_file": data_file,
+        }
+        meta_path = os.path.join(self.state_dir, f"{stem}.json")
+        with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+            f.write(json_util.dumps(meta, indent=2))
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+        self.prune()
+        return meta
+
+    def _write_data(self, df, stem):
+        if feather is not None:
+            data_file = f"{stem}.feather"
+            tmp_path = os.path.join(self.state_dir, f"{data_file}.tmp")
+            try:
+                write_arrow(df, tmp_path)
+                os.replace(tmp_path, os.path.join(self.state_dir, data_file))
+                return "feather", data_file
+            except Exception:
+                # e.g. mixed-type object columns Arrow cannot represent
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        data_file = f"{stem}.pkl"
+        tmp_path = os.path.join(self.state_dir, f"{data_file}.tmp")
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, os.path.join(self.state_dir, data_file))
+        return "pickle", data_file
+
+    def prune(self):
+        """Keep only the newest `keep` snapshots."""
+        for meta in self._metadata()[self.keep:]:
+            for path in (meta["meta_path"], os.path.join(self.state_dir, meta.get("data_file", ""))):
+                if os.path.isfile(path):
+                    os.remove(path)
+
+    def clear(self):
+        """Forget all snapshots so the next run does a full rebuild."""
+        for path in glob.glob(os.path.join(self.state_dir, "snapshot-*")):
+            os.remove(path)
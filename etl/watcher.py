@@ -0,0 +1,254 @@
+import threading
+import time
+
+from etl.Data_Loader import ANIMAL_ID_FIELDS
+
+
+# Source collections the merged dataset is built from
+WATCHED_COLLECTIONS = ("intakes", "outcomes")
+
+# Projection that reads only what is needed to map a document to its animal
+ID_PROJECTION = {"_id": 1, **{field: 1 for field in ANIMAL_ID_FIELDS}}
+
+# Versions of frames carrying watcher batches on top of a snapshot: "<snapshot>+live3"
+LIVE_SUFFIX = "+live"
+
+
+def base_version(version):
+    """Snapshot version a (possibly live-updated) dataset version was built on."""
+    return str(version).split(LIVE_SUFFIX, 1)[0]
+
+
+def document_animal_id(document):
+    """animal_id of a raw source document (either field name), or None."""
+    for field in ANIMAL_ID_FIELDS:
+        value = document.get(field)
+        if value is not None:
+            return str(value)
+    return None
+
+
+class ChangeWatcher:
+    """
+    Keep the merged dataset live by applying source changes per affected animal.
+
+    Two ways of noticing changes, chosen by mode:
+    - "stream": MongoDB change streams (replica sets / Atlas) report inserts,
+      updates, replaces and deletes as they happen
+    - "poll":   _id polling (works on any server, mongomock, a local mongod);
+      new documents are found with _id > last seen, deletes when a collection's
+      count drops below what is known; in-place updates are not visible to polling
+    - "auto":   change streams, falling back to polling when they are unavailable
+
+    Changed animal_ids are collected and applied in micro-batches (one per
+    batch_window seconds) through ETLManager.replace_animals, which re-derives
+    only those animals' rows and rewrites the rollup keys they touch. The served
+    (frame, version) comes from current(), e.g. LiveDataset.current, and the new frame
+    goes to on_update(df, version), e.g. LiveDataset.swap, all under the ETLManager
+    lock so a refresher run cannot swap in between. The version records its lineage:
+    "<snapshot>+liveN", the snapshot the batches were applied on.
+
+    A map of every source document's _id to its animal_id is kept so deletes,
+    which only report the _id, can be traced back to their animal.
+    """
+
+    def __init__(self, etl_manager, logger, current, on_update, mode="auto",
+                 poll_interval=5, batch_window=1.0, collections=WATCHED_COLLECTIONS):
+        if mode not in ("auto", "stream", "poll"):
+            raise ValueError("mode must be 'auto', 'stream' or 'poll'")
+
+        self.etl_manager = etl_manager
+        self.db = etl_manager.db
+        self.logger = logger
+        self.current = current
+        self.on_update = on_update
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.batch_window = batch_window
+        self.collections = tuple(collections)
+
+        self.owners = {}          # collection -> {_id: animal_id}
+        self.last_id = {}         # collection -> newest _id seen (polling)
+        self.resume_tokens = {}   # collection -> change stream resume token
+        self.pending = set()      # animal_ids waiting to be applied
+        self.applied_batches = 0
+
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    # -------------------------------
+    # Lifecycle
+    # -------------------------------
+    def start(self):
+        for collection in self.collections:
+            self._index_collection(collection)
+
+        self._spawn(self._apply_loop, "watch-apply")
+        for collection in self.collections:
+            if self.mode == "poll":
+                self._spawn(self._poll_loop, f"watch-poll-{collection}", collection)
+            else:
+                self._spawn(self._stream_loop, f"watch-stream-{collection}", collection)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._changed.set()
+
+    def _spawn(self, target, name, *args):
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _index_collection(self, collection):
+        """Read the _id -> animal_id map and the newest _id once, at startup."""
+        owners = {}
+        for chunk in self.db.stream({}, collection, projection=ID_PROJECTION, chunk_size=10000):
+            for document in chunk:
+                owners[document["_id"]] = document_animal_id(document)
+        self.owners[collection] = owners
+        self.last_id[collection] = self.db.max_value(collection, "_id")
+
+    # -------------------------------
+    # Change sources
+    # -------------------------------
+    def _stream_loop(self, collection):
+        while not self._stop.is_set():
+            try:
+                options = {"full_document": "updateLookup"}
+                if self.resume_tokens.get(collection) is not None:
+                    options["resume_after"] = self.resume_tokens[collection]
+
+                with self.db.database[collection].watch(**options) as stream:
+                    while not self._stop.is_set():
+                        event = stream.try_next()
+                        if event is None:
+                            time.sleep(0.1)
+                            continue
+                        self.resume_tokens[collection] = stream.resume_token
+                        self.handle_event(collection, event)
+
+            except Exception as e:
+                if self.mode == "stream":
+                    self.logger.warning(f"Watcher: change stream on '{collection}' failed, retrying: {e}")
+                    self._stop.wait(self.poll_interval)
+                    continue
+                self.logger.info(f"Watcher: change streams unavailable on '{collection}', polling _id instead ({e}).")
+                self._poll_loop(collection)
+                return
+
+    def _poll_loop(self, collection):
+        while not self._stop.is_set():
+            try:
+                self.poll(collection)
+            except Exception as e:
+                self.logger.error(f"Watcher: polling '{collection}' failed: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def handle_event(self, collection, event):
+        """Record the animal touched by one change stream event."""
+        operation = event.get("operationType")
+        key = event.get("documentKey", {}).get("_id")
+        owners = self.owners.setdefault(collection, {})
+        animals = set()
+
+        if operation in ("insert", "update", "replace"):
+            document = event.get("fullDocument") or {}
+            animal_id = document_animal_id(document)
+            # An update can move a document to another animal: refresh both
+            previous = owners.get(key)
+            if previous is not None:
+                animals.add(previous)
+            if animal_id is not None:
+                animals.add(animal_id)
+                owners[key] = animal_id
+        elif operation == "delete":
+            previous = owners.pop(key, None)
+            if previous is not None:
+                animals.add(previous)
+        elif operation in ("drop", "rename", "invalidate"):
+            self.logger.warning(f"Watcher: '{operation}' event on '{collection}'; every animal is refreshed.")
+            animals.update(a for a in owners.values() if a is not None)
+
+        self._mark(animals)
+
+    def poll(self, collection):
+        """Find documents inserted (and deleted) since the last poll of collection."""
+        owners = self.owners.setdefault(collection, {})
+        animals = set()
+
+        after = self.last_id.get(collection)
+        for chunk in self.db.stream({}, collection, projection=ID_PROJECTION,
+                                    chunk_size=1000, keyset=True, after_id=after):
+            for document in chunk:
+                animal_id = document_animal_id(document)
+                owners[document["_id"]] = animal_id
+                if animal_id is not None:
+                    animals.add(animal_id)
+                self.last_id[collection] = document["_id"]
+
+        # Fewer documents than known: find which _ids are gone (one _id-only scan)
+        if self.db.count(collection) < len(owners):
+            present = set()
+            for chunk in self.db.stream({}, collection, projection={"_id": 1}, chunk_size=10000):
+                present.update(document["_id"] for document in chunk)
+            for key in [k for k in owners if k not in present]:
+                animal_id = owners.pop(key)
+                if animal_id is not None:
+                    animals.add(animal_id)
+
+        self._mark(animals)
+        return animals
+
+    def _mark(self, animals):
+        if not animals:
+            return
+        with self._lock:
+            self.pending.update(animals)
+        self._changed.set()
+
+    # -------------------------------
+    # Apply
+    # -------------------------------
+    def _apply_loop(self):
+        while not self._stop.is_set():
+            self._changed.wait()
+            if self._stop.is_set():
+                return
+            # Let a burst of events collect into one batch
+            self._stop.wait(self.batch_window)
+            self._changed.clear()
+            try:
+                self.apply_pending()
+            except Exception as e:
+                self.logger.error(f"Watcher: applying changes failed: {e}")
+
+    def apply_pending(self):
+        """Apply every pending animal to the current frame; returns the new frame or None."""
+        with self._lock:
+            animals, self.pending = self.pending, set()
+        if not animals:
+            return None
+
+        started = time.perf_counter()
+        with self.etl_manager.lock:
+            frame, served = self.current()
+            try:
+                df = self.etl_manager.replace_animals(frame, animals)
+            except Exception:
+                # Keep the animals so the next batch retries them
+                with self._lock:
+                    self.pending.update(animals)
+                raise
+
+            self.applied_batches += 1
+            version = f"{base_version(served)}{LIVE_SUFFIX}{self.applied_batches}"
+            self.on_update(df, version)
+
+        self.logger.info(
+            f"Watcher: applied changes for {len(animals)} animals in "
+            f"{time.perf_counter() - started:.2f}s (version {version})."
+        )
+        return df
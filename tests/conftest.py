@@ -0,0 +1,101 @@
+import os
+import sys
+
+import mongomock
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "Dashboard")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+os.environ.setdefault("MONGO_USER", "test")
+os.environ.setdefault("MONGO_PASS", "test")
+os.environ.setdefault("MONGO_CLUSTER", "localhost")
+
+import CRUD_Python_Module.crud as crud  # noqa: E402
+from etl.Data_Loader import DataLoader  # noqa: E402
+from etl.ETL_Manager import ETLManager  # noqa: E402
+from etl.logger import get_logger  # noqa: E402
+from etl.state import SnapshotStore  # noqa: E402
+
+
+
+def _drop_sort(add):
+    def wrapper(self, *args, sort=None, **kwargs):
+        return add(self, *args, **kwargs)
+    return wrapper
+
+
+# mongomock's bulk builder predates the sort= argument newer pymongo passes along
+for _name in ("add_update", "add_replace"):
+    _add = getattr(mongomock.collection.BulkOperationBuilder, _name)
+    if "sort" not in _add.__code__.co_varnames:
+        setattr(mongomock.collection.BulkOperationBuilder, _name, _drop_sort(_add))
+
+BREEDS = ["Labrador Retriever Mix", "German Shepherd", "Pit Bull Mix", "Bloodhound", "Domestic Shorthair"]
+OUTCOME_TYPES = ["Adoption", "Transfer", "Return to Owner"]
+
+
+def intake_doc(animal_id, when, breed="Labrador Retriever Mix"):
+    return {
+        "Animal ID": animal_id, "DateTime Intake": str(when), "Breed": breed,
+        "Name": "Rex", "Animal Type": "Dog", "Color": "Black",
+    }
+
+
+def outcome_doc(animal_id, when, breed="Labrador Retriever Mix", outcome_type="Adoption"):
+    return {
+        "animal_id": animal_id, "datetime_outcome": str(when), "breed": breed, "outcome_type": outcome_type,
+        "age_upon_outcome_in_weeks": 52.0, "location_lat": 30.1, "location_long": -97.7,
+        "name": "Rex", "color": "Black", "animal_type": "Dog",
+    }
+
+
+def seed(db, stays=300, animals=200, seed=0):
+    """Insert random intakes (and, for most stays, a later outcome) for up to `animals` animals."""
+    rng = np.random.default_rng(seed)
+    intakes, outcomes = [], []
+    for _ in range(stays):
+        animal_id = f"A{rng.integers(0, animals):05d}"
+        intake = pd.Timestamp("2018-01-01") + pd.Timedelta(days=int(rng.integers(0, 1500)))
+        intakes.append(intake_doc(animal_id, intake, str(rng.choice(BREEDS))))
+        if rng.random() < 0.8:
+            outcome = intake + pd.Timedelta(days=int(rng.integers(0, 60)))
+            outcomes.append(outcome_doc(animal_id, outcome, str(rng.choice(BREEDS)), str(rng.choice(OUTCOME_TYPES))))
+    db.database["intakes"].insert_many(intakes)
+    db.database["outcomes"].insert_many(outcomes)
+
+
+def same_frame(left, right):
+    keys = ["animal_id", "datetime_intake"]
+    pd.testing.assert_frame_equal(
+        left.sort_values(keys).reset_index(drop=True),
+        right.sort_values(keys).reset_index(drop=True),
+    )
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """An AnimalShelter backed by a fresh in-memory mongomock server."""
+    server = mongomock.MongoClient()
+    monkeypatch.setattr(crud, "MongoClient", lambda *args, **kwargs: server)
+    monkeypatch.setattr(crud, "clients", crud.ClientRegistry())
+    return crud.AnimalShelter()
+
+
+@pytest.fixture(scope="session")
+def logger():
+    return get_logger("tests")
+
+
+@pytest.fixture
+def make_manager(db, logger, tmp_path):
+    """Factory for ETLManagers over `db`; each state_dir name gets its own snapshot store."""
+    def make(state_dir="state", **kwargs):
+        kwargs.setdefault("rollups", False)
+        store = SnapshotStore(str(tmp_path / state_dir))
+        return ETLManager(db, logger, DataLoader(db, logger), state_store=store, **kwargs)
+    return make
@@ -0,0 +1,50 @@
+"""AsyncAnimalShelter.bulk_write keeps at most `concurrency` batches in flight."""
+import asyncio
+from types import SimpleNamespace
+
+from CRUD_Python_Module.async_crud import AsyncAnimalShelter
+
+
+class SlowCollection:
+    """Async insert_many that records how many calls overlap."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.documents = []
+
+    async def insert_many(self, documents, ordered=False):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.001)
+        self.documents.extend(documents)
+        self.active -= 1
+        return SimpleNamespace(inserted_ids=[doc["n"] for doc in documents])
+
+
+def test_unordered_bulk_write_reads_operations_lazily():
+    collection = SlowCollection()
+    shelter = AsyncAnimalShelter(database={"animals": collection})
+    produced = []
+
+    def documents():
+        for n in range(1000):
+            # Never more than `concurrency` batches read ahead of what was written
+            assert n - len(collection.documents) <= 4 * 10
+            produced.append(n)
+            yield {"n": n}
+
+    stats = asyncio.run(shelter.bulk_write(documents(), "animals", batch_size=10, concurrency=4))
+    assert stats["inserted"] == 1000 and stats["batches"] == 100 and not stats["errors"]
+    assert collection.peak == 4
+    assert sorted(doc["n"] for doc in collection.documents) == produced
+
+
+def test_ordered_bulk_write_sends_one_batch_at_a_time():
+    collection = SlowCollection()
+    shelter = AsyncAnimalShelter(database={"animals": collection})
+
+    stats = asyncio.run(shelter.bulk_write(({"n": n} for n in range(50)), "animals", batch_size=10, ordered=True))
+    assert stats["inserted"] == 50
+    assert collection.peak == 1
+    assert [doc["n"] for doc in collection.documents] == list(range(50))
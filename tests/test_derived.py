@@ -0,0 +1,27 @@
+"""Derived fields computed on the merged (intake + outcome) frame."""
+import pandas as pd
+
+from conftest import intake_doc, outcome_doc
+from etl.derived import compute_derived_fields
+
+
+def test_is_working_dog_uses_outcome_then_intake_breed():
+    df = pd.DataFrame({
+        "breed_outcome": ["Border Collie", None, "Beagle"],
+        "breed_intake": ["Beagle", "Belgian Malinois", "German Shepherd Dog"],
+    })
+    assert compute_derived_fields(df)["is_working_dog"].tolist() == [True, True, False]
+
+
+def test_is_working_dog_without_breed_columns():
+    assert not compute_derived_fields(pd.DataFrame({"animal_id": ["A1"]}))["is_working_dog"].any()
+
+
+def test_is_working_dog_after_merge(db, make_manager):
+    db.database["intakes"].insert_many([
+        intake_doc("A00001", "2021-01-01 10:00:00", "Border Collie"),
+        intake_doc("A00002", "2021-01-01 10:00:00", "Beagle"),
+    ])
+    db.database["outcomes"].insert_one(outcome_doc("A00001", "2021-01-05 10:00:00", "Border Collie"))
+    df = make_manager().run_pipeline().set_index("animal_id")
+    assert bool(df.loc["A00001", "is_working_dog"]) and not bool(df.loc["A00002", "is_working_dog"])
@@ -0,0 +1,54 @@
+"""CsvIngestor checkpoints: resume after the last good chunk, never past a failed one."""
+import pandas as pd
+import pytest
+
+from CRUD_Python_Module.ingest import CsvIngestor
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "intakes.csv"
+    pd.DataFrame({
+        "Animal ID": [f"A{i:05d}" for i in range(50)],
+        "DateTime": pd.date_range("2020-01-01", periods=50, freq="D").astype(str),
+        "Breed": ["Beagle"] * 50,
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def make_ingestor(db, logger, tmp_path):
+    return CsvIngestor(db, logger, "intakes", chunk_size=10, batch_size=5, writers=3,
+                       state_dir=str(tmp_path / "state"))
+
+
+def test_rerun_resumes_after_checkpoint(db, logger, tmp_path, csv_path):
+    ingestor = make_ingestor(db, logger, tmp_path)
+    first = ingestor.ingest(csv_path)
+    assert first["rows_done"] == 50 and first["inserted"] == 50
+
+    second = ingestor.ingest(csv_path)
+    assert second["rows"] == 0
+    assert db.database["intakes"].count_documents({}) == 50
+
+
+def test_failed_chunk_holds_checkpoint_back(db, logger, tmp_path, csv_path, monkeypatch):
+    bulk_write = db.bulk_write
+
+    def failing_bulk_write(documents, collection, **kwargs):
+        if documents[0]["animal_id"] == "A00020":
+            return {"inserted": 0, "errors": [{"batch": 0, "index": 0, "code": 2, "message": "boom"}]}
+        return bulk_write(documents, collection, **kwargs)
+
+    ingestor = make_ingestor(db, logger, tmp_path)
+    monkeypatch.setattr(db, "bulk_write", failing_bulk_write)
+    summary = ingestor.ingest(csv_path)
+    assert summary["rows_done"] == 20
+    assert len(summary["errors"]) == 1
+    assert ingestor.load_checkpoint(csv_path)["rows_done"] == 20
+
+    monkeypatch.setattr(db, "bulk_write", bulk_write)
+    resumed = ingestor.ingest(csv_path)
+    assert resumed["rows"] == 30
+    assert resumed["inserted"] == 10 and resumed["duplicates"] == 20
+    assert resumed["rows_done"] == 50
+    assert db.database["intakes"].count_documents({}) == 50
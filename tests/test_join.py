@@ -0,0 +1,59 @@
+"""The sort-merge stay join against a brute-force as-of join."""
+import numpy as np
+import pandas as pd
+
+from etl.join import join_stays, stay_outcome_positions
+
+
+def random_stays(seed, animals=40, intakes=300, outcomes=260):
+    rng = np.random.default_rng(seed)
+    ids = np.array([f"A{i:05d}" for i in range(animals)])
+    start = pd.Timestamp("2018-01-01")
+    intakes_df = pd.DataFrame({
+        "animal_id": ids[rng.integers(0, animals, intakes)],
+        "datetime_intake": start + pd.to_timedelta(rng.integers(0, 900, intakes), unit="D"),
+        "breed": "Beagle",
+    })
+    outcomes_df = pd.DataFrame({
+        "animal_id": ids[rng.integers(0, animals, outcomes)],
+        "datetime_outcome": start + pd.to_timedelta(rng.integers(0, 900, outcomes), unit="D"),
+        "outcome_type": "Adoption",
+    })
+    intakes_df.loc[rng.random(intakes) < 0.05, "datetime_intake"] = pd.NaT
+    outcomes_df.loc[rng.random(outcomes) < 0.05, "datetime_outcome"] = pd.NaT
+    return intakes_df, outcomes_df
+
+
+def brute_force(intakes_df, outcomes_df):
+    """First outcome at or after each intake; the latest intake keeps a shared outcome."""
+    positions = np.full(len(intakes_df), -1)
+    for k, (animal, when) in enumerate(zip(intakes_df["animal_id"], intakes_df["datetime_intake"])):
+        if pd.isna(when):
+            continue
+        candidates = outcomes_df[(outcomes_df["animal_id"] == animal) & (outcomes_df["datetime_outcome"] >= when)]
+        if len(candidates):
+            positions[k] = candidates["datetime_outcome"].idxmin()
+
+    for outcome in set(positions[positions >= 0]):
+        sharing = np.flatnonzero(positions == outcome)
+        keep = max(sharing, key=lambda k: (intakes_df["datetime_intake"].iloc[k], k))
+        positions[sharing[sharing != keep]] = -1
+    return positions
+
+
+def test_positions_match_brute_force():
+    for seed in range(3):
+        intakes_df, outcomes_df = random_stays(seed)
+        positions = stay_outcome_positions(
+            intakes_df["animal_id"], intakes_df["datetime_intake"].to_numpy().view("i8"),
+            outcomes_df["animal_id"], outcomes_df["datetime_outcome"].to_numpy().view("i8"),
+        )
+        np.testing.assert_array_equal(positions, brute_force(intakes_df, outcomes_df))
+
+
+def test_join_stays_keeps_every_intake_and_never_goes_back_in_time():
+    intakes_df, outcomes_df = random_stays(7)
+    joined = join_stays(intakes_df, outcomes_df)
+    assert len(joined) == len(intakes_df)
+    days = (joined["datetime_outcome"] - joined["datetime_intake"]).dt.days
+    assert (days.dropna() >= 0).all()
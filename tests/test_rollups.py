@@ -0,0 +1,61 @@
+"""Rollup collections after incremental runs match a full rebuild, however often a change is applied."""
+from conftest import intake_doc, outcome_doc, seed
+from CRUD_Python_Module.crud import ROLLUP_COLLECTIONS
+from etl.rollups import ROLLUP_SPECS
+
+
+def rollup_contents(db):
+    return {
+        name: sorted((str(doc["_id"]), {k: v for k, v in doc.items() if k != "_id"}.__repr__())
+                     for doc in db.database[ROLLUP_COLLECTIONS[name]].find())
+        for name in ROLLUP_SPECS
+    }
+
+
+def full_rollups(db, make_manager):
+    make_manager("full", rollups=True).run_pipeline()
+    return rollup_contents(db)
+
+
+def change_source(db):
+    db.database["intakes"].insert_one(intake_doc("Z00001", "2022-06-01 10:00:00", "Bloodhound"))
+    db.database["outcomes"].insert_one(outcome_doc("Z00001", "2022-06-20 10:00:00", "Bloodhound", "Adoption"))
+    seed(db, stays=40, seed=1)
+
+
+def test_incremental_rollups_match_full_rebuild(db, make_manager):
+    seed(db)
+    manager = make_manager(rollups=True)
+    manager.run_incremental()
+    change_source(db)
+    manager.run_incremental()
+
+    incremental = rollup_contents(db)
+    assert incremental == full_rollups(db, make_manager)
+
+
+def test_every_worker_applying_the_same_change_counts_once(db, make_manager):
+    seed(db)
+    workers = [make_manager(f"worker-{i}", rollups=True) for i in range(3)]
+    for worker in workers:
+        worker.run_incremental()
+    change_source(db)
+    for worker in workers:
+        worker.run_incremental()
+
+    incremental = rollup_contents(db)
+    assert incremental == full_rollups(db, make_manager)
+
+
+def test_removed_animal_keys_are_deleted(db, make_manager):
+    seed(db)
+    db.database["intakes"].insert_one(intake_doc("Z00002", "2022-06-01 10:00:00", "Rare Breed"))
+    db.database["outcomes"].insert_one(outcome_doc("Z00002", "2022-06-20 10:00:00", "Rare Breed", "Adoption"))
+    manager = make_manager(rollups=True)
+    previous = manager.run_incremental()
+    assert db.database[ROLLUP_COLLECTIONS["rescue_breed"]].count_documents({"breed": "Rare Breed"}) == 1
+
+    db.database["intakes"].delete_many({"Animal ID": "Z00002"})
+    db.database["outcomes"].delete_many({"animal_id": "Z00002"})
+    manager.replace_animals(previous, ["Z00002"])
+    assert db.database[ROLLUP_COLLECTIONS["rescue_breed"]].count_documents({"breed": "Rare Breed"}) == 0